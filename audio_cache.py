@@ -0,0 +1,83 @@
+"""Decoded audio of a source video, cut by sample ranges for exports.
+
+The first export with audio decodes the whole track once into
+<stem>_audio.pcm next to the video (16-bit stereo at AUDIO_RATE, with
+<stem>_audio.json recording which source it came from). Exports then copy
+each rally's samples out of a memory map of that file into a wav that the
+encoder muxes in as it is, so cutting costs only the rallies' length and
+memory stays flat however long the video is.
+"""
+import os
+import wave
+import numpy as np
+from ffmpeg_utils import run_ffmpeg, probe
+import sidecar
+
+AUDIO_RATE = 44100
+CHANNELS = 2
+COPY_BLOCK = AUDIO_RATE * 10  # sample frames copied at a time
+
+def cache_path(video_path):
+    return sidecar.sidecar_path(video_path, "audio.pcm")
+
+def info_path(video_path):
+    return os.path.splitext(cache_path(video_path))[0] + ".json"
+
+def load(video_path):
+    """Memory map of the cached samples, (frames, CHANNELS) int16, or None
+    if there is no up to date cache."""
+    info = sidecar.read_json(info_path(video_path))
+    path = cache_path(video_path)
+    if not sidecar.is_fresh(info, video_path, rate=AUDIO_RATE, channels=CHANNELS) or not os.path.exists(path):
+        return None
+    if os.path.getsize(path) == 0:
+        return np.zeros((0, CHANNELS), dtype=np.int16)
+    return np.memmap(path, dtype=np.int16, mode="r").reshape(-1, CHANNELS)
+
+def build(video_path):
+    """Decode the first audio track into the cache and return its memory map."""
+    path = cache_path(video_path)
+    tmp_path = path + ".part"
+    info = sidecar.stamp(video_path, rate=AUDIO_RATE, channels=CHANNELS)
+    try:
+        run_ffmpeg(["-i", video_path, "-map", "0:a:0", "-vn", "-ac", CHANNELS, "-ar", AUDIO_RATE,
+                    "-f", "s16le", tmp_path])
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    sidecar.write_json(info_path(video_path), info)
+    return load(video_path)
+
+def load_or_build(video_path):
+    """The cached samples, decoding them first if needed. None if the video has no audio."""
+    pcm = load(video_path)
+    if pcm is None and probe(video_path).get("audio_found"):
+        print(f"Decoding audio of {video_path}")
+        pcm = build(video_path)
+    return pcm
+
+def write_rallies(pcm, clip_ranges, wav_path):
+    """Write the (start, end, ...) ranges of pcm back to back as a wav.
+
+    Each rally's length is rounded on the output timeline rather than on
+    its own, so the audio doesn't drift from the video over many rallies.
+    Time past the end of the track is silence. Returns the wav's duration.
+    """
+    with wave.open(wav_path, "wb") as wav:
+        wav.setnchannels(CHANNELS)
+        wav.setsampwidth(2)
+        wav.setframerate(AUDIO_RATE)
+        offset = 0.0
+        for start, end, *_ in clip_ranges:
+            first = round(offset * AUDIO_RATE)
+            offset += end - start
+            count = round(offset * AUDIO_RATE) - first
+            source = round(start * AUDIO_RATE)
+            for done in range(0, count, COPY_BLOCK):
+                n = min(COPY_BLOCK, count - done)
+                block = pcm[min(source + done, len(pcm)):min(source + done + n, len(pcm))]
+                if len(block) < n:
+                    block = np.concatenate((block, np.zeros((n - len(block), CHANNELS), dtype=np.int16)))
+                wav.writeframes(np.ascontiguousarray(block).tobytes())
+    return offset
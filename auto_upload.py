@@ -1,20 +1,36 @@
 import os
+import time
+import random
 import pickle
+import requests
 from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from google.auth.transport.requests import Request, AuthorizedSession
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import sidecar
 
 # Use the 'youtube.upload' scope
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
+UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
 
-def get_authenticated_service():
+CHUNK_SIZE = 32 * 1024 * 1024   # must be a multiple of 256 KiB
+MAX_RETRIES = 8
+BACKOFF_BASE = 1.0              # seconds, doubled after each failed attempt
+MAX_BACKOFF = 64.0
+RETRY_STATUS = {500, 502, 503, 504}
+
+class UploadError(Exception):
+    pass
+
+class TransientError(Exception):
+    """A failure worth retrying, e.g. a 503 from the upload server."""
+
+def get_credentials():
     creds = None
     # The file token.pickle stores the user's access and refresh tokens
     if os.path.exists('token.pickle'):
         with open('token.pickle', 'rb') as token:
             creds = pickle.load(token)
-            
+
     # If there are no (valid) credentials available, let the user log in.
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
@@ -23,18 +39,49 @@ def get_authenticated_service():
             flow = InstalledAppFlow.from_client_secrets_file(
                 'client_secrets.json', SCOPES)
             creds = flow.run_local_server(port=0)
-        
+
         # Save the credentials for the next run
         with open('token.pickle', 'wb') as token:
             pickle.dump(creds, token)
 
-    return build("youtube", "v3", credentials=creds)
+    return creds
+
+def authorized_session():
+    """A requests session that signs its requests, for upload_video."""
+    return AuthorizedSession(get_credentials())
+
+def get_authenticated_service():
+    return build("youtube", "v3", credentials=get_credentials())
+
+def session_path(video_path):
+    return sidecar.sidecar_path(video_path, "upload.json")
+
+def load_session(video_path):
+    """The saved upload session URI for this exact file, or None."""
+    saved = sidecar.read_json(session_path(video_path))
+    if not sidecar.is_fresh(saved, video_path):
+        return None
+    return saved.get("uri")
 
-def upload_video(video_path):
-    youtube = get_authenticated_service()
-    date, team1, team2 = video_path.removesuffix(".mp4").split("-")
+def save_session(video_path, uri):
+    sidecar.write_json(session_path(video_path), sidecar.stamp(video_path, uri=uri))
 
-    title = f"[{date}] {team1.replace("_", "/")} vs {team2.replace("_", "/")}"
+def clear_session(video_path):
+    try:
+        os.remove(session_path(video_path))
+    except FileNotFoundError:
+        pass
+
+def upload_video(video_path, title=None, progress=None, chunk_size=CHUNK_SIZE, session=None, upload_url=UPLOAD_URL):
+    """Upload with YouTube's resumable protocol, chunk_size bytes per request.
+
+    title defaults to the file's name; exports pass the one planned for each
+    output (see output_specs.plan_outputs).
+    progress(sent, total) is called as each chunk goes out. The session URI is
+    saved next to the video, so if the upload is interrupted (or the process
+    dies) the next call picks up from the last byte the server has.
+    """
+    title = title or os.path.splitext(os.path.basename(video_path))[0]
     print(f"Uploading video: {title}")
     request_body = {
         'snippet': {
@@ -47,13 +94,96 @@ def upload_video(video_path):
         }
     }
 
-    media = MediaFileUpload(video_path, chunksize=-1, resumable=True)
-
-    request = youtube.videos().insert(
-        part="snippet,status",
-        body=request_body,
-        media_body=media
-    )
+    if session is None:
+        session = authorized_session()
+    size = os.path.getsize(video_path)
+    uri = load_session(video_path)
+    offset = None
+    if uri:
+        offset = with_retries(lambda: query_offset(session, uri, size))
+        if offset is None:
+            print("Upload session expired, starting over")
+            uri = None
+        elif isinstance(offset, dict):
+            response = offset  # it finished before we could record that
+            offset = None
+        else:
+            print(f"Resuming upload at {offset}/{size} bytes")
+    if uri is None:
+        uri = with_retries(lambda: start_session(session, upload_url, request_body, size))
+        save_session(video_path, uri)
+        offset = 0
 
-    response = request.execute()
+    with open(video_path, "rb") as f:
+        while offset is not None:
+            if progress:
+                progress(offset, size)
+            f.seek(offset)
+            data = f.read(chunk_size)
+            result = with_retries(lambda: send_chunk(session, uri, data, offset, size),
+                                  lambda: query_offset(session, uri, size))
+            if result is None:
+                clear_session(video_path)
+                raise UploadError("upload session expired")
+            if isinstance(result, dict):
+                response = result
+                offset = None
+            else:
+                offset = result
+    if progress:
+        progress(size, size)
+    clear_session(video_path)
     print(f"Video uploaded! ID: {response.get('id')}")
+    return response
+
+def with_retries(attempt, recover=None):
+    """Run attempt(), retrying transient failures with exponential backoff.
+    After a failure recover() (if given) is run instead of attempt() and its
+    result returned, e.g. to find out how much of a chunk arrived."""
+    for retry in range(MAX_RETRIES + 1):
+        try:
+            return attempt() if retry == 0 or recover is None else recover()
+        except (requests.ConnectionError, requests.Timeout, TransientError) as e:
+            if retry == MAX_RETRIES:
+                raise UploadError(f"giving up after {MAX_RETRIES} retries: {e}") from e
+            delay = min(BACKOFF_BASE * 2**retry, MAX_BACKOFF) * random.uniform(0.5, 1.0)
+            print(f"Upload interrupted ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def check(response):
+    if response.status_code in RETRY_STATUS:
+        raise TransientError(f"HTTP {response.status_code}")
+    if response.status_code >= 400 and response.status_code not in (404, 410):
+        raise UploadError(f"HTTP {response.status_code}: {response.text[:500]}")
+
+def start_session(session, upload_url, body, size):
+    response = session.post(upload_url, params={"uploadType": "resumable", "part": "snippet,status"},
+                            json=body, headers={"X-Upload-Content-Length": str(size),
+                                                "X-Upload-Content-Type": "video/*"})
+    check(response)
+    if response.status_code != 200 or "Location" not in response.headers:
+        raise UploadError(f"couldn't start upload: HTTP {response.status_code}")
+    return response.headers["Location"]
+
+def upload_status(response):
+    """Next byte the server wants, the finished video resource, or None if
+    the session is gone."""
+    check(response)
+    if response.status_code in (200, 201):
+        return response.json()
+    if response.status_code in (404, 410):
+        return None
+    if response.status_code != 308:
+        raise UploadError(f"unexpected HTTP {response.status_code}")
+    received = response.headers.get("Range")  # bytes=0-N
+    return int(received.rsplit("-", 1)[1]) + 1 if received else 0
+
+def query_offset(session, uri, size):
+    return upload_status(session.put(uri, headers={"Content-Range": f"bytes */{size}", "Content-Length": "0"},
+                                     allow_redirects=False))
+
+def send_chunk(session, uri, data, offset, size):
+    end = offset + len(data) - 1
+    # 308 means "resume incomplete" here, not a redirect
+    return upload_status(session.put(uri, data=data, headers={"Content-Range": f"bytes {offset}-{end}/{size}"},
+                                     allow_redirects=False))
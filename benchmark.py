@@ -0,0 +1,297 @@
+"""Benchmarks for the export pipeline and the marking UI, on synthetic matches.
+
+Sources are generated offline with ffmpeg's test patterns and cached in the
+work directory, markers are random but seeded, so two runs with the same
+options measure the same work. Results are written as JSON; pass the file
+from an earlier commit with --compare to see what got faster or slower:
+
+    python benchmark.py --duration 300 --rallies 40 --output after.json --compare before.json
+"""
+import os, sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+import statistics
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+from marker_type import MarkerType
+from ffmpeg_utils import run_ffmpeg, ffmpeg_binary
+from export_engine import ExportJob, build_clip_ranges, render
+from ffmpeg_utils import available_cores
+from rally_reader import RallyReader
+import audio_cache
+import scoreboard
+import seek_index
+import export_profiles
+
+def make_source(workdir, duration, size, fps):
+    """Test pattern video with a tone, cached by its settings."""
+    path = os.path.join(workdir, f"synthetic_{size[0]}x{size[1]}_{fps}fps_{duration}s.mp4")
+    if not os.path.exists(path):
+        print(f"Generating {path}")
+        tmp_path = path + ".part.mp4"
+        run_ffmpeg(["-f", "lavfi", "-i", f"testsrc2=size={size[0]}x{size[1]}:rate={fps}:duration={duration}",
+                    "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}:sample_rate=48000",
+                    "-c:v", "libx264", "-preset", "ultrafast", "-g", fps * 2, "-pix_fmt", "yuv420p",
+                    "-c:a", "aac", "-shortest", tmp_path])
+        os.replace(tmp_path, path)
+    return path
+
+def make_marks(duration, rallies, seed=0):
+    """(ms, MarkerType) for rallies spread evenly over the video, each a
+    Serve followed by a point for a random side."""
+    rng = random.Random(seed)
+    slot = duration * 1000 // max(rallies, 1)
+    marks = []
+    for k in range(rallies):
+        serve = k * slot + rng.randrange(0, max(slot // 4, 1))
+        end = min(serve + rng.randrange(3000, 12000), (k + 1) * slot - 1)
+        marks.append((serve, MarkerType.SERVE))
+        marks.append((end, rng.choice([MarkerType.HOME_PT, MarkerType.AWAY_PT])))
+    return marks
+
+def write_marks(video_path, marks):
+    path = os.path.splitext(video_path)[0] + "_marks.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"file": video_path, "marks": [{"time": t, "label": m} for t, m in marks]}, f)
+    return path
+
+class Stopwatch:
+    """Seconds spent per stage, added up over repeated laps."""
+    def __init__(self):
+        self.totals = {}
+
+    def lap(self, stage, started):
+        now = time.perf_counter()
+        self.totals[stage] = self.totals.get(stage, 0.0) + now - started
+        return now
+
+def bench_export(video_path, marks, workdir, threads, full=True, profile=export_profiles.DEFAULT_PROFILE):
+    """Seconds per stage of a scoreboard export, run one stage at a time
+    over the same rallies render_reencode would produce."""
+    settings = export_profiles.resolve(profile, video_path, threads)
+    watch = Stopwatch()
+    t = time.perf_counter()
+    clip_ranges, scores = build_clip_ranges(marks)
+    t = watch.lap("segmentation", t)
+    for path in (seek_index.index_path(video_path), audio_cache.cache_path(video_path)):
+        if os.path.exists(path):
+            os.remove(path)
+    index = seek_index.load_or_build(video_path)
+    t = watch.lap("indexing", t)
+    pcm = audio_cache.load_or_build(video_path)
+    t = watch.lap("audio decode", t)
+    audio_cache.write_rallies(pcm, clip_ranges, os.path.join(workdir, "bench_audio.wav"))
+    t = watch.lap("audio cut", t)
+
+    reader = RallyReader(video_path, clip_ranges, size=settings.size if settings.resize else None, index=index)
+    overlays = [scoreboard.text_scoreboard_overlay(reader.size[0], "Home", "Away", home, away) for home, away in scores]
+    t = watch.lap("scoreboard render", t)
+    output_path = os.path.join(workdir, "bench_stages.mp4")
+    writer = FFMPEG_VideoWriter(output_path, reader.size, settings.fps, codec=settings.codec, preset=settings.preset,
+                                threads=settings.threads, ffmpeg_params=["-crf", str(settings.crf)])
+    frames = int(reader.duration * settings.fps)
+    t = time.perf_counter()
+    for n in range(frames):
+        i, source_t = reader.locate(n / settings.fps)
+        frame = reader.get_frame(source_t)
+        t = watch.lap("decode", t)
+        frame = overlays[i].blend(frame)
+        t = watch.lap("composite", t)
+        writer.write_frame(frame)
+        t = watch.lap("encode", t)
+    writer.close()
+    reader.close()
+    watch.lap("encode", t)
+
+    result = {"profile": settings.profile, "output_size": list(settings.size), "fps": settings.fps,
+              "rallies": len(clip_ranges), "output_seconds": round(reader.duration, 3), "frames": frames,
+              "seeks": reader.seeks, "stages": {stage: round(s, 4) for stage, s in watch.totals.items()}}
+    if full:
+        job = ExportJob(video_path, marks=marks, output_path=os.path.join(workdir, "bench_export.mp4"),
+                        stream_copy=False, threads=threads, profile=profile, logger=None)
+        t = time.perf_counter()
+        render(job, clip_ranges, scores)
+        result["full_export"] = round(time.perf_counter() - t, 4)
+    return result
+
+def per_call(function, calls):
+    """Mean microseconds per call."""
+    started = time.perf_counter()
+    for i in range(calls):
+        function(i)
+    return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+def bench_gui(workdir, marker_counts, duration, calls=200):
+    """update_score, add_marker and the timeline's paintEvent with many markers."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    import main
+    from marker_journal import MarkerJournal
+    main.DEFAULT_IMPORT = None  # start empty, the markers are set below
+    try:
+        window = main.VideoApp()
+    except Exception as e:
+        return {"skipped": f"couldn't create the window: {type(e).__name__}: {e}"}
+    # hidden widgets don't paint
+    window.resize(1600, 900)
+    window.show()
+    app.processEvents()
+    timeline = window.timeline
+    timeline.set_duration(duration * 1000)
+    results = {"timeline_width": timeline.width()}
+    for count in marker_counts:
+        rng = random.Random(count)
+        marks = sorted((rng.randrange(duration * 1000), rng.choice(list(MarkerType))) for _ in range(count))
+        window.marker_model.set_marks(marks)
+        timeline.set_markers(window.marker_model.marks)
+        window.journal = MarkerJournal(os.path.join(workdir, f"bench_gui_{count}.mp4"), window.marker_model.marks)
+        times = [rng.randrange(duration * 1000) for _ in range(calls)]
+
+        update_score = per_call(lambda i: window.update_score(times[i]), calls)
+        # the player has no media, so feed it the times to mark at
+        window.player.get_time = lambda: times[len(window.marker_model.marks) - count]
+        add_marker = per_call(lambda i: (window.add_marker(MarkerType.SERVE), app.processEvents()), calls)
+        # cold: markers changed so the layer is redrawn, warm: only the playhead moved
+        paint_cold = per_call(lambda i: (timeline.invalidate(), timeline.repaint()), calls // 4)
+        paint_warm = per_call(lambda i: (timeline.set_position(times[i]), timeline.repaint()), calls)
+        window.journal.close()
+        results[str(count)] = {"update_score_us": update_score, "add_marker_us": add_marker,
+                               "paint_cold_us": paint_cold, "paint_warm_us": paint_warm}
+    window.journal = None
+    window.exports.close()
+    window.uploads.close()
+    return results
+
+# Run in a fresh interpreter: prints when main was imported, the window
+# created, its first frame painted and the event loop free again after it.
+STARTUP_SCRIPT = """
+import sys, time, json
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QObject, QEvent, QTimer
+app = QApplication(sys.argv[:1])
+times = {}
+import main
+times["imported"] = time.time()
+main.DEFAULT_IMPORT = sys.argv[1] or None
+window = main.VideoApp()
+times["created"] = time.time()
+class FirstPaint(QObject):
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint and "painted" not in times:
+            times["painted"] = time.time()
+            QTimer.singleShot(0, interactive)
+        return False
+def interactive():
+    times["interactive"] = time.time()
+    print(json.dumps(times), flush=True)
+    # not quit(), which closes the window and so asks for confirmation
+    app.exit()
+first_paint = FirstPaint()
+window.installEventFilter(first_paint)
+window.show()
+app.exec()
+window.exports.close()
+window.uploads.close()
+"""
+
+def bench_startup(runs, video_path=None):
+    """Milliseconds from launching the editor to its first frame and to when
+    it responds to input, with the median over runs fresh processes."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        launched = time.time()
+        proc = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, video_path or ""], cwd=cwd,
+                              capture_output=True, text=True, timeout=120)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if not lines:
+            error = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+            return {"skipped": f"the editor didn't start: {error}"}
+        times = json.loads(lines[-1])
+        samples.append({stage: (t - launched) * 1000 for stage, t in times.items()})
+    return {stage + "_ms": round(statistics.median(sample[stage] for sample in samples), 1) for stage in samples[0]}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(current, previous, path=()):
+    """Print how each timing changed against an earlier result."""
+    for key, value in current.items():
+        old = previous.get(key) if isinstance(previous, dict) else None
+        if isinstance(value, dict):
+            compare(value, old, path + (key,))
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            print(f"{'/'.join(path + (key,)):50s} {old:>12} -> {value:<12} {value / old:6.2f}x")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time exports and marking on synthetic matches.")
+    parser.add_argument("--duration", type=int, default=120, help="source length in seconds")
+    parser.add_argument("--size", default="1280x720", help="source resolution, WxH")
+    parser.add_argument("--fps", type=int, default=30, help="source frame rate")
+    parser.add_argument("--rallies", type=int, default=10)
+    parser.add_argument("--markers", default="1000,10000,100000", help="marker counts for the UI benchmarks")
+    parser.add_argument("--threads", type=int, default=available_cores())
+    parser.add_argument("--profile", choices=list(export_profiles.PROFILES), default=export_profiles.DEFAULT_PROFILE)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "gameplay-benchmark"),
+                        help="where sources are generated and kept between runs")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="earlier result to compare against")
+    parser.add_argument("--skip-export", action="store_true")
+    parser.add_argument("--skip-full-export", action="store_true", help="only time the stages one by one")
+    parser.add_argument("--skip-gui", action="store_true")
+    parser.add_argument("--skip-startup", action="store_true")
+    parser.add_argument("--startup-runs", type=int, default=5, help="editor launches to time")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    size = tuple(int(x) for x in args.size.lower().split("x"))
+    report = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cores": available_cores(),
+        "ffmpeg": ffmpeg_binary(),
+        "config": {"duration": args.duration, "size": list(size), "fps": args.fps, "rallies": args.rallies,
+                   "threads": args.threads, "profile": args.profile},
+        "results": {},
+    }
+    if not args.skip_export:
+        video_path = make_source(args.workdir, args.duration, size, args.fps)
+        marks = make_marks(args.duration, args.rallies)
+        write_marks(video_path, marks)
+        print("Timing export stages")
+        report["results"]["export"] = bench_export(video_path, marks, args.workdir, args.threads,
+                                                   full=not args.skip_full_export, profile=args.profile)
+    if not args.skip_gui:
+        print("Timing marking")
+        counts = [int(n) for n in args.markers.split(",") if n]
+        report["results"]["gui"] = bench_gui(args.workdir, counts, args.duration)
+
+    if not args.skip_startup:
+        print("Timing startup")
+        report["results"]["startup"] = bench_startup(args.startup_runs)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"\nCompared with {args.compare} ({previous.get('commit')}):")
+        compare(report["results"], previous.get("results", {}))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,626 @@
+"""Qt-free export pipeline.
+
+Turns a video plus its markers into the rally cut that the Export button
+produces, and runs many of those exports side by side from the command line:
+
+    python export_engine.py saturday/*.mp4 --workers 4
+"""
+import os, sys
+import json
+import glob
+import time
+import heapq
+import queue
+import itertools
+import threading
+import argparse
+import tempfile
+import ctypes
+import proglog
+from dataclasses import dataclass, replace, asdict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+from marker_type import MarkerType
+from score_index import ScoreIndex
+import marker_journal
+import proxy
+import audio_cache
+from ffmpeg_utils import FFmpegError, available_cores
+from rally_reader import RallyReader, RallyTimeline, rally_clip
+import fast_cut
+import scoreboard
+import seek_index
+import export_profiles
+import output_specs
+import metrics
+from metrics import ExportMetrics
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FRAME_QUEUE = 8     # frames buffered for each encoder of a multi-output export
+SEGMENTS_PREFIX = "segments-"   # temporary directory of a segment export, next to its output
+CANCEL_POLL = 0.5   # seconds between cancel checks while segments encode
+MEMORY_POLL = 0.5   # seconds between a segment worker's memory checks
+
+class WorkerMemoryError(MemoryError):
+    """Raised in a segment worker that went over worker_memory_mb."""
+
+class SegmentationError(ValueError):
+    """Raised when the markers can't be split into rallies."""
+
+class ExportCancelled(Exception):
+    """Raised from a progress logger to stop an export part way."""
+
+@dataclass
+class ExportJob:
+    video_path: str
+    marks_path: str = None
+    marks: list = None          # [(time in ms, MarkerType)], used instead of marks_path
+    home_name: str = "Home"
+    away_name: str = "Away"
+    output_path: str = None
+    add_score: bool = True
+    audio: bool = True
+    upload: bool = False
+    stream_copy: bool = True    # cut without re-encoding when there's no scoreboard
+    segment_workers: int = 1    # > 1 encodes groups of rallies in parallel processes
+    segment_group_size: int = 1
+    worker_memory_mb: int = None  # resident memory a segment worker may use, not counting its ffmpeg
+    threads: int = None         # encoder threads, default one per available core
+    profile: str = export_profiles.DEFAULT_PROFILE
+    outputs: list = None        # OutputSpecs to make several files from one decode, e.g. match + highlights
+    logger: str = "bar"         # or a proglog logger, which also gets stage=... updates
+    metrics: object = None      # ExportMetrics, export_match makes one if not given
+
+def recording_date(video_path):
+    return time.strftime("%b%d", time.localtime(os.path.getmtime(video_path))).lower()
+
+def default_output_path(video_path, home_name, away_name, output_dir=""):
+    name = f"{recording_date(video_path)}-{home_name.replace("/","_")}-{away_name.replace("/","_")}.mp4"
+    return os.path.join(output_dir, name)
+
+def match_title(video_path, home_name, away_name):
+    return f"[{recording_date(video_path)}] {home_name} vs {away_name}"
+
+def rally_audio_path(output_path):
+    return os.path.splitext(output_path)[0] + "_audio.wav"
+
+def partial_files(output_paths):
+    """Files a stopped export can leave behind: the outputs it planned and
+    their rally audio, not files of earlier exports next to them."""
+    return [file for path in output_paths for file in (path, rally_audio_path(path))]
+
+def segment_dirs(output_path):
+    """Temporary segment directories a killed export leaves next to its output."""
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    return glob.glob(os.path.join(glob.escape(output_dir), SEGMENTS_PREFIX + "*"))
+
+def load_marks(marks_path):
+    with open(marks_path, "r", encoding="utf-8") as f:
+        loaded = json.load(f)
+    return [(mark["time"], MarkerType(mark["label"])) for mark in loaded["marks"]]
+
+def build_clip_ranges(marks):
+    """Split markers into (start, end, name) rallies in seconds.
+
+    marks is a ScoreIndex or a list of (time in ms, MarkerType). Also returns
+    the (home, away) score shown during each rally, which includes points
+    marked before the first serve in case the recording starts after 0-0.
+    """
+    index = marks if isinstance(marks, ScoreIndex) else ScoreIndex(marks)
+    clip_ranges = []
+    scores = []
+    current_start = None
+    found_first_serve = False
+    for i, (timestamp, name) in enumerate(index):
+        t = round(timestamp/1000, 1)
+        if name == MarkerType.SERVE:
+            found_first_serve = True
+            current_start = t
+            current_score = index.score_before(i)
+        elif found_first_serve:
+            if current_start is not None:
+                clip_ranges.append((current_start, t, name))
+                scores.append(current_score)
+                current_start = None
+            else:
+                raise SegmentationError(f"{name} at timestamp {t} doesn't have start serve.")
+    return clip_ranges, scores
+
+def render(job, clip_ranges, scores, outputs=None):
+    """Encode the rallies into job.output_path, or into each of outputs
+    (PlannedOutputs) if given. Returns the seconds of video written."""
+    if job.metrics is None:
+        # called without export_match, e.g. by the benchmarks
+        job = replace(job, metrics=ExportMetrics())
+    logger = proglog.default_bar_logger(job.logger)
+    settings = export_profiles.resolve(job.profile, job.video_path, job.threads or available_cores())
+    # the settings end up in the metrics report next to the output
+    job.metrics.info["encode_settings"] = asdict(settings)
+    logger(stage="indexing")
+    try:
+        with job.metrics.stage("indexing"):
+            index = seek_index.load_or_build(job.video_path)
+    except FFmpegError as e:
+        print(f"Couldn't index {job.video_path}: {e}")
+        index = None
+    if job.stream_copy and not job.add_score:
+        reason = fast_cut.copy_blocker(job.video_path, size=settings.size, clip_ranges=clip_ranges, index=index,
+                                       fps=settings.fps)
+        if reason is None:
+            logger(stage="cutting")
+            try:
+                job.metrics.info["stream_copy"] = True
+                with job.metrics.stage("stream copy"):
+                    if outputs:
+                        return sum(fast_cut.stream_copy_export(job.video_path, [clip_ranges[i] for i in output.rallies],
+                                                               output.path, job.audio, index) for output in outputs)
+                    return fast_cut.stream_copy_export(job.video_path, clip_ranges, job.output_path, job.audio, index)
+            except FFmpegError as e:
+                reason = str(e)
+        print(f"Can't stream copy ({reason}), re-encoding instead")
+    if job.audio:
+        # decoded once here, segment workers only read it
+        logger(stage="decoding audio")
+        with job.metrics.stage("audio decode"):
+            audio_cache.load_or_build(job.video_path)
+    if outputs:
+        return render_outputs(job, settings, clip_ranges, outputs)
+    if job.segment_workers > 1 and len(clip_ranges) > 1:
+        return render_segments(job, settings, clip_ranges, scores)
+    return render_reencode(job, settings, clip_ranges, scores)
+
+def rally_stream(job, settings, clip_ranges, scores):
+    """All rallies back to back, read from the source in one forward pass.
+
+    Returns the clip and the readers to close once it has been written.
+    """
+    # ffmpeg scales while decoding, only when the source isn't the output size already
+    reader = RallyReader(job.video_path, clip_ranges, size=settings.size if settings.resize else None,
+                         index=seek_index.load(job.video_path))
+    sources = [reader]
+    overlays = None
+    if job.add_score:
+        overlays = [scoreboard.text_scoreboard_overlay(reader.size[0], job.home_name, job.away_name, home, away)
+                    for home, away in scores]
+    return rally_clip(reader, overlays, job.metrics), sources
+
+def rally_audio(job, clip_ranges, wav_path):
+    """Write the rallies' audio to wav_path for the encoder to mux in.
+    Returns wav_path, or False if the export has no audio."""
+    if not job.audio:
+        return False
+    pcm = audio_cache.load_or_build(job.video_path)
+    if pcm is None:
+        return False
+    with job.metrics.stage("audio cut"):
+        audio_cache.write_rallies(pcm, clip_ranges, wav_path)
+    return wav_path
+
+def write_rallies(job, settings, final, sources, clip_ranges, output_path, logger):
+    """Encode the rally stream to output_path and count what it took."""
+    wav_path = rally_audio_path(output_path)
+    try:
+        audio = rally_audio(job, clip_ranges, wav_path)
+        # frames are decoded and composited as the encoder asks for them
+        with job.metrics.stage_excluding("encode", "decode", "composite"):
+            final.write_videofile(output_path, logger=logger, audio=audio, **settings.write_options())
+    finally:
+        for source in sources:
+            source.close()
+            job.metrics.count("seeks", source.seeks)
+        if os.path.exists(wav_path):
+            os.remove(wav_path)
+    job.metrics.count("frames", round(final.duration * settings.fps))
+    job.metrics.info.update(source_fps=sources[0].fps, output_size=list(sources[0].size))
+    return final.duration
+
+def render_reencode(job, settings, clip_ranges, scores):
+    proglog.default_bar_logger(job.logger)(stage="encoding")
+    final, sources = rally_stream(job, settings, clip_ranges, scores)
+    return write_rallies(job, settings, final, sources, clip_ranges, job.output_path, job.logger)
+
+class EncoderThread(threading.Thread):
+    """Writes one output's frames to its ffmpeg process, so the outputs of a
+    multi-output export encode side by side."""
+    def __init__(self, writer):
+        super().__init__(daemon=True)
+        self.writer = writer
+        self.frames = queue.Queue(maxsize=FRAME_QUEUE)
+        self.error = None
+        self.seconds = 0.0
+
+    def run(self):
+        try:
+            while (frame := self.frames.get()) is not None:
+                if self.error is None:
+                    started = time.perf_counter()
+                    try:
+                        self.writer.write_frame(frame)
+                    except Exception as e:
+                        # keep taking frames so the decoder isn't blocked, it checks error
+                        self.error = e
+                    self.seconds += time.perf_counter() - started
+        finally:
+            self.writer.close()
+
+def output_frames(timeline, fps, reader, k):
+    """(source frame number, output, source time, rally) for every frame of one
+    output, in the order they are written."""
+    for n in range(int(timeline.duration * fps)):
+        j, source_t = timeline.locate(n / fps)
+        yield reader.frame_number(source_t), k, source_t, j
+
+def render_outputs(job, settings, clip_ranges, outputs):
+    """Encode several outputs from a single pass over the source.
+
+    Each source frame any output needs is decoded once, composited once per
+    distinct scoreboard and queued to the encoders of every output that
+    shows it; each output has its own ffmpeg process and writer thread.
+    """
+    logger = proglog.default_bar_logger(job.logger)
+    logger(stage=f"encoding {len(outputs)} outputs")
+    needed = sorted({i for output in outputs for i in output.rallies})
+    reader = RallyReader(job.video_path, [clip_ranges[i] for i in needed],
+                         size=settings.size if settings.resize else None, index=seek_index.load(job.video_path))
+    # the outputs share the cores between them
+    options = replace(settings, threads=max(1, settings.threads // len(outputs))).write_options()
+    timelines = [RallyTimeline([clip_ranges[i] for i in output.rallies]) for output in outputs]
+    encoders = []
+    wav_paths = []
+    try:
+        overlays = []
+        for output, timeline in zip(outputs, timelines):
+            wav_path = rally_audio(job, timeline.ranges, rally_audio_path(output.path))
+            if wav_path:
+                wav_paths.append(wav_path)
+            encoders.append(EncoderThread(FFMPEG_VideoWriter(output.path, reader.size, audiofile=wav_path or None,
+                                                             **options)))
+            overlays.append({score: scoreboard.text_scoreboard_overlay(reader.size[0], job.home_name, job.away_name, *score)
+                             for score in output.scores} if job.add_score else None)
+        for encoder in encoders:
+            encoder.start()
+
+        total = sum(int(timeline.duration * settings.fps) for timeline in timelines)
+        logger(frame_index__total=total)
+        frames = heapq.merge(*(output_frames(timeline, settings.fps, reader, k) for k, timeline in enumerate(timelines)))
+        written = 0
+        for _, requests in itertools.groupby(frames, key=lambda request: request[0]):
+            requests = list(requests)
+            with job.metrics.stage("decode"):
+                frame = reader.get_frame(requests[0][2])
+            job.metrics.count("frames_decoded")
+            job.metrics.count("decoded_bytes", frame.nbytes)
+            # shared by the outputs, so blending works on a copy
+            frame.setflags(write=False)
+            composited = {None: frame}
+            for _, k, _, j in requests:
+                score = outputs[k].scores[j] if overlays[k] else None
+                if score not in composited:
+                    with job.metrics.stage("composite"):
+                        composited[score] = overlays[k][score].blend(frame)
+                        composited[score].setflags(write=False)
+                if encoders[k].error:
+                    raise encoders[k].error
+                encoders[k].frames.put(composited[score])
+            written += len(requests)
+            logger(frame_index__index=written)
+    finally:
+        for encoder in encoders:
+            if encoder.is_alive():
+                encoder.frames.put(None)
+                encoder.join()
+        reader.close()
+        for path in wav_paths:
+            if os.path.exists(path):
+                os.remove(path)
+    for encoder in encoders:
+        if encoder.error:
+            raise encoder.error
+    job.metrics.add_time("encode", sum(encoder.seconds for encoder in encoders))
+    job.metrics.count("frames", total)
+    job.metrics.count("seeks", reader.seeks)
+    job.metrics.info.update(source_fps=reader.fps, output_size=list(reader.size), outputs=len(outputs))
+    return sum(timeline.duration for timeline in timelines)
+
+def resident_memory():
+    """Memory this process uses now, in bytes (its peak where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+worker_memory_mb = None     # set in segment workers by limit_worker_memory
+
+def limit_worker_memory(max_mb):
+    """Process pool initializer: segments encoded in this worker stop with a
+    WorkerMemoryError once it uses more than max_mb (POSIX only).
+
+    An RLIMIT_AS would be inherited by the ffmpeg processes the worker
+    starts, where x264 fails with misleading errors, so the worker watches
+    its own memory from a thread instead (see memory_watch).
+    """
+    global worker_memory_mb
+    worker_memory_mb = max_mb if resource else None
+
+@contextmanager
+def memory_watch():
+    """Raise WorkerMemoryError in this thread if the worker goes over its
+    limit while the block runs."""
+    if not worker_memory_mb:
+        yield
+        return
+    thread = threading.get_ident()
+    done = threading.Event()
+    lock = threading.Lock()
+    def watch():
+        while not done.wait(MEMORY_POLL):
+            if resident_memory() <= worker_memory_mb * 1024 * 1024:
+                continue
+            with lock:
+                if not done.is_set():
+                    # raised the next time the encoding thread runs Python code
+                    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread),
+                                                               ctypes.py_object(WorkerMemoryError))
+                    done.set()
+    watcher = threading.Thread(target=watch, name="memory-limit", daemon=True)
+    watcher.start()
+    try:
+        yield
+    finally:
+        with lock:
+            done.set()
+
+def segment_worker_count(job, groups):
+    workers = max(1, min(job.segment_workers, groups))
+    if job.worker_memory_mb and hasattr(os, "sysconf"):
+        try:
+            available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (ValueError, OSError):
+            return workers
+        workers = max(1, min(workers, available // (job.worker_memory_mb * 1024 * 1024)))
+    return workers
+
+def stop_pool(pool):
+    """Shut a pool down without waiting for the segments it is encoding."""
+    # ProcessPoolExecutor has no public way to stop running tasks (before 3.14)
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+def encode_segment(job, settings, clip_ranges, scores, segment_path):
+    """Encode one group of rallies into its own file (runs in a worker).
+    Returns its duration and what its metrics measured."""
+    job = replace(job, metrics=ExportMetrics())
+    with memory_watch():
+        segment, sources = rally_stream(job, settings, clip_ranges, scores)
+        duration = write_rallies(job, settings, segment, sources, clip_ranges, segment_path, None)
+    return duration, job.metrics.snapshot()
+
+def render_segments(job, settings, clip_ranges, scores):
+    """Encode groups of rallies in parallel and join them without re-encoding.
+
+    Every group is encoded with the same settings, so the pieces can be
+    stream copied into the output in order.
+    """
+    size = max(1, job.segment_group_size)
+    groups = [(clip_ranges[i:i+size], scores[i:i+size]) for i in range(0, len(clip_ranges), size)]
+    workers = segment_worker_count(job, len(groups))
+    segment_job = replace(job, logger=None)
+    segment_settings = replace(settings, threads=max(1, settings.threads // workers))
+    print(f"Encoding {len(groups)} segments with {workers} workers")
+    # progress in output frames, moved on as each segment finishes
+    logger = proglog.default_bar_logger(job.logger)
+    logger(stage="encoding segments")
+    frames = [round(sum(end - start for start, end, name in ranges) * settings.fps) for ranges, _ in groups]
+    logger(frame_index__total=sum(frames))
+
+    output_dir = os.path.dirname(os.path.abspath(job.output_path))
+    with tempfile.TemporaryDirectory(prefix=SEGMENTS_PREFIX, dir=output_dir) as workdir:
+        segment_paths = [os.path.join(workdir, f"{i:04d}.mp4") for i in range(len(groups))]
+        with ProcessPoolExecutor(max_workers=workers, initializer=limit_worker_memory,
+                                 initargs=(job.worker_memory_mb,)) as pool:
+            futures = [pool.submit(encode_segment, segment_job, segment_settings, ranges, group_scores, path)
+                       for (ranges, group_scores), path in zip(groups, segment_paths)]
+            duration = 0
+            try:
+                with job.metrics.stage("segments"):
+                    for i, future in enumerate(futures):
+                        while True:
+                            try:
+                                segment_duration, snapshot = future.result(timeout=CANCEL_POLL)
+                                break
+                            except TimeoutError:
+                                logger()  # where a cancel is noticed
+                        duration += segment_duration
+                        # stage times add up over workers, "segments" is the wall time
+                        job.metrics.merge(snapshot, rally_offset=i * size)
+                        logger(frame_index__index=sum(frames[:i+1]))
+            except BaseException:
+                stop_pool(pool)
+                raise
+        job.metrics.info["segment_workers"] = workers
+        logger(stage="joining")
+        with job.metrics.stage("joining"):
+            fast_cut.concat_segments(segment_paths, job.output_path)
+    return duration
+
+def export_match(job):
+    """Run one export and report how it went instead of raising."""
+    started = time.perf_counter()
+    # markers taken on a proxy are valid on its source, which is what gets exported
+    job = replace(job, video_path=proxy.original_path(job.video_path), metrics=job.metrics or ExportMetrics())
+    profiler = metrics.start_profile()
+    result = {"video": job.video_path, "output": job.output_path, "status": "failed",
+              "error": None, "rallies": 0, "duration": 0.0, "elapsed": 0.0}
+    logger = proglog.default_bar_logger(job.logger)
+    rendering = False
+    try:
+        logger(stage="markers")
+        with job.metrics.stage("markers"):
+            if job.marks is not None:
+                marks = job.marks
+            elif job.marks_path:
+                marks = load_marks(job.marks_path)
+            else:
+                # the editor's autosave, including changes not compacted yet
+                marks, _ = marker_journal.replay(job.video_path)
+        if not job.output_path:
+            job.output_path = default_output_path(job.video_path, job.home_name, job.away_name)
+            result["output"] = job.output_path
+        print(f"Exporting to {job.output_path}")
+        with job.metrics.stage("segmentation"):
+            clip_ranges, scores = build_clip_ranges(marks)
+        if not clip_ranges:
+            raise SegmentationError("No complete rallies to export.")
+        result["rallies"] = len(clip_ranges)
+        title = match_title(job.video_path, job.home_name, job.away_name)
+        result["titles"] = {job.output_path: title}
+        outputs = None
+        if job.outputs:
+            outputs = output_specs.plan_outputs(job.outputs, job.output_path, clip_ranges, scores, title)
+            result["outputs"] = [output.path for output in outputs]
+            # so a worker killed from outside knows which files are this export's
+            logger(outputs=result["outputs"])
+            result["titles"] = {output.path: output.title for output in outputs}
+        rendering = True
+        result["duration"] = render(job, clip_ranges, scores, outputs)
+        rendering = False
+        if job.upload:
+            logger(stage="uploading")
+            from auto_upload import upload_video
+            for path in result.get("outputs") or [job.output_path]:
+                # also where a cancel is noticed; the upload resumes next time
+                with job.metrics.stage("upload"):
+                    upload_video(path, result["titles"][path], progress=lambda sent, total: logger(stage=f"uploading {sent * 100 // total}%"))
+                job.metrics.count("uploaded_bytes", os.path.getsize(path))
+        result["status"] = "done"
+    except ExportCancelled:
+        result["status"] = "cancelled"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    if rendering:
+        # don't leave a half written video behind
+        for path in partial_files(result.get("outputs") or [job.output_path]):
+            if os.path.exists(path):
+                os.remove(path)
+    metrics.stop_profile(profiler, job.output_path)
+    result["elapsed"] = time.perf_counter() - started
+    if result["status"] == "done":
+        result["metrics"] = job.metrics.write_report(result, clip_ranges)
+    return result
+
+def format_result(result):
+    if result["status"] == "cancelled":
+        return f"[cancelled] {result['video']}"
+    if result["status"] != "done":
+        return f"[{result['status']}] {result['video']}: {result['error']}"
+    speed = result["duration"] / result["elapsed"] if result["elapsed"] else 0
+    return (f"[{result['status']}] {result['output']}: {result['rallies']} rallies, "
+            f"{result['duration']:.1f}s in {result['elapsed']:.1f}s ({speed:.2f}x realtime)")
+
+def run_batch(jobs, workers=None, on_result=None):
+    """Export every job in a process pool sized to the available cores."""
+    cores = available_cores()
+    workers = max(1, min(workers or cores, len(jobs)))
+    # split the encoder threads between workers instead of oversubscribing
+    for job in jobs:
+        job.threads = max(1, cores // workers)
+        if workers > 1:
+            job.logger = None
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(export_match, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+    elapsed = time.perf_counter() - started
+
+    done = [r for r in results if r["status"] == "done"]
+    output_seconds = sum(r["duration"] for r in done)
+    print(f"{len(done)}/{len(jobs)} exports finished in {elapsed:.1f}s with {workers} workers "
+          f"({output_seconds / elapsed if elapsed else 0:.2f}s of video per second)")
+    return results
+
+def jobs_from_args(args):
+    jobs = []
+    if args.jobs:
+        with open(args.jobs, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                jobs.append(ExportJob(
+                    video_path=entry["video"],
+                    marks_path=entry.get("marks"),
+                    home_name=entry.get("home", args.home),
+                    away_name=entry.get("away", args.away),
+                    output_path=entry.get("output"),
+                    add_score=not args.no_score,
+                    audio=not args.no_audio,
+                    upload=args.upload,
+                    stream_copy=not args.reencode,
+                    segment_workers=args.segment_workers,
+                    segment_group_size=args.group_size,
+                    worker_memory_mb=args.worker_memory,
+                    profile=entry.get("profile", args.profile),
+                    outputs=output_specs.parse_specs(entry.get("outputs", args.outputs))))
+    marks_paths = args.marks or []
+    for i, video_path in enumerate(args.videos):
+        jobs.append(ExportJob(
+            video_path=video_path,
+            marks_path=marks_paths[i] if i < len(marks_paths) else None,
+            home_name=args.home,
+            away_name=args.away,
+            add_score=not args.no_score,
+            audio=not args.no_audio,
+            upload=args.upload,
+            stream_copy=not args.reencode,
+            segment_workers=args.segment_workers,
+            segment_group_size=args.group_size,
+            worker_memory_mb=args.worker_memory,
+            profile=args.profile,
+            outputs=output_specs.parse_specs(args.outputs)))
+    for job in jobs:
+        if not job.output_path:
+            job.output_path = default_output_path(job.video_path, job.home_name, job.away_name, args.output_dir)
+    return jobs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export rally cuts for one or more marked videos.")
+    parser.add_argument("videos", nargs="*", help="videos to export, markers are read from <stem>_marks.json")
+    parser.add_argument("--marks", nargs="+", help="marker files, in the same order as the videos")
+    parser.add_argument("--jobs", help="JSON list of {video, marks, home, away, output, profile, outputs} entries")
+    parser.add_argument("--home", default="Home")
+    parser.add_argument("--away", default="Away")
+    parser.add_argument("--output-dir", default="")
+    parser.add_argument("--workers", type=int, help="default: one per available core")
+    parser.add_argument("--no-score", action="store_true", help="don't add the scoreboard")
+    parser.add_argument("--no-audio", action="store_true")
+    parser.add_argument("--segment-workers", type=int, default=1, help="encode groups of rallies in this many processes")
+    parser.add_argument("--group-size", type=int, default=1, help="rallies per parallel segment")
+    parser.add_argument("--worker-memory", type=int, help="memory limit per segment worker (not its ffmpeg), in MB")
+    parser.add_argument("--reencode", action="store_true", help="re-encode even when the rallies could be stream copied")
+    parser.add_argument("--upload", action="store_true", help="upload each export to YouTube")
+    parser.add_argument("--profile", choices=list(export_profiles.PROFILES), default=export_profiles.DEFAULT_PROFILE,
+                        help="size, frame rate and quality of the exports")
+    parser.add_argument("--outputs", help="files to make from one decode of each video, e.g. match,highlights:8,sets:25")
+    args = parser.parse_args(argv)
+
+    jobs = jobs_from_args(args)
+    if not jobs:
+        parser.error("nothing to export")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    results = run_batch(jobs, args.workers, on_result=lambda result: print(format_result(result)))
+    return 0 if all(r["status"] == "done" for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
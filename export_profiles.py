@@ -0,0 +1,101 @@
+"""Named encoder settings for exports, fitted to the source being exported.
+
+A profile says how big, how smooth and how compressed an export should be;
+resolve() turns it into concrete settings for one source. The source is only
+resized when its size differs from the profile's, frame rates the profile
+allows are kept as they are (faster ones are halved, thirded, ... to fit,
+so no frames are invented or unevenly dropped), and the encoder gets a
+thread per available core.
+"""
+import math
+from dataclasses import dataclass
+from ffmpeg_utils import probe
+
+DEFAULT_FPS = 30    # when the source doesn't say
+
+@dataclass(frozen=True)
+class ExportProfile:
+    name: str
+    size: tuple = None          # (w, h) to fit into, None keeps the source size
+    upscale: bool = False       # also enlarge smaller sources to size
+    max_fps: float = 60
+    preset: str = "medium"      # x264 speed/size trade-off
+    crf: int = 20               # x264 quality, lower is better and bigger
+    audio_bitrate: str = "192k"
+
+PROFILES = {
+    # quick to check the cut, not to keep
+    "draft": ExportProfile("draft", size=(1280, 720), max_fps=30, preset="ultrafast", crf=28, audio_bitrate="128k"),
+    # what YouTube handles best: 1080p (smaller sources are scaled up, which gets them a higher bitrate
+    # on YouTube), the recording's own frame rate and a high quality it re-encodes from
+    "upload": ExportProfile("upload", size=(1920, 1080), upscale=True, max_fps=60, preset="medium", crf=18),
+    # kept as recorded, smaller files at the same quality for slower encoding
+    "archive": ExportProfile("archive", size=None, max_fps=120, preset="slow", crf=18, audio_bitrate="256k"),
+}
+DEFAULT_PROFILE = "upload"
+
+@dataclass(frozen=True)
+class EncodeSettings:
+    profile: str
+    size: tuple         # output (w, h)
+    resize: bool        # False when the source already is that size
+    fps: float
+    codec: str
+    preset: str
+    crf: int
+    audio_codec: str
+    audio_bitrate: str
+    threads: int
+
+    def write_options(self):
+        """Keyword arguments for VideoClip.write_videofile."""
+        return {"fps": self.fps, "codec": self.codec, "preset": self.preset, "threads": self.threads,
+                "audio_codec": self.audio_codec,
+                # moviepy ignores audio_bitrate for an audio file it is given, so pass it to ffmpeg directly
+                "ffmpeg_params": ["-crf", str(self.crf), "-b:a", self.audio_bitrate, "-movflags", "+faststart"]}
+
+def get_profile(name):
+    try:
+        return PROFILES[name or DEFAULT_PROFILE]
+    except KeyError:
+        raise ValueError(f"Unknown export profile {name!r}, expected one of {', '.join(PROFILES)}")
+
+def fit_size(source_size, profile):
+    """Output size for a source: the profile's size kept to the source's
+    aspect ratio, with even sides for yuv420p."""
+    if not source_size:
+        return tuple(profile.size or (1920, 1080))
+    w, h = source_size
+    if profile.size is None:
+        return (w - w % 2, h - h % 2)
+    scale = min(profile.size[0] / w, profile.size[1] / h)
+    if scale > 1 and not profile.upscale:
+        scale = 1
+    out_w, out_h = round(w * scale), round(h * scale)
+    return (out_w - out_w % 2, out_h - out_h % 2)
+
+def fit_fps(source_fps, max_fps):
+    """source_fps, or the largest whole fraction of it within max_fps."""
+    if not source_fps:
+        return min(DEFAULT_FPS, max_fps)
+    return source_fps / math.ceil(source_fps / max_fps - 1e-6)
+
+def resolve(profile, video_path, threads, infos=None):
+    """EncodeSettings for exporting video_path with profile (a name or an ExportProfile)."""
+    if not isinstance(profile, ExportProfile):
+        profile = get_profile(profile)
+    infos = infos if infos is not None else probe(video_path)
+    source_size = tuple(infos.get("video_size") or ())
+    size = fit_size(source_size, profile)
+    return EncodeSettings(
+        profile=profile.name,
+        size=size,
+        resize=size != source_size,
+        fps=round(fit_fps(infos.get("video_fps"), profile.max_fps), 3),
+        codec="libx264",
+        preset=profile.preset,
+        crf=profile.crf,
+        audio_codec="aac",
+        audio_bitrate=profile.audio_bitrate,
+        threads=max(1, threads),
+    )
@@ -0,0 +1,261 @@
+"""Runs exports in a separate process so the editor stays responsive.
+
+ExportQueue keeps the queued exports on the GUI side and hands them to one
+worker process at a time. The worker streams progress back over a
+multiprocessing queue, which the GUI drains on a timer; cancelling sets an
+event the worker checks on every frame, and if it doesn't stop within
+CANCEL_GRACE seconds the worker is killed, along with the segment pool and
+ffmpeg processes it started, and its partial files are removed.
+"""
+import os
+import time
+import shutil
+import signal
+import itertools
+import multiprocessing
+import queue
+from collections import deque
+from dataclasses import dataclass, field, replace
+import proglog
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+# export_engine (and moviepy with it) is imported where it's used, so the
+# editor doesn't load it at startup
+
+POLL_INTERVAL = 100     # ms
+REPORT_INTERVAL = 0.25  # seconds between progress messages from the worker
+CANCEL_GRACE = 10.0     # seconds
+
+task_ids = itertools.count(1)
+
+@dataclass
+class ExportTask:
+    job: object                 # export_engine.ExportJob
+    id: int = field(default_factory=lambda: next(task_ids))
+    state: str = "queued"       # queued, running, done, failed, cancelled
+    stage: str = ""
+    frames: int = 0
+    total_frames: int = 0
+    fps: float = 0.0
+    eta: float = None           # seconds
+    result: dict = None
+    outputs: list = None        # paths the worker planned, when it writes more than output_path
+    cancel_requested: float = None
+
+    def describe(self):
+        name = os.path.basename(self.job.output_path or self.job.video_path)
+        if self.state != "running":
+            return f"{name}: {self.state}"
+        text = f"{name}: {self.stage}"
+        if self.total_frames:
+            text += f" {self.frames}/{self.total_frames} frames"
+        if self.fps:
+            text += f", {self.fps:.0f} fps"
+        if self.eta is not None:
+            text += f", ETA {int(self.eta // 60)}:{int(self.eta % 60):02d}"
+        return text
+
+class ProgressLogger(proglog.ProgressBarLogger):
+    """Sends stage and frame progress to the GUI and stops the export when
+    it is cancelled."""
+    def __init__(self, task_id, events, cancel):
+        super().__init__(logged_bars=None)
+        self.task_id = task_id
+        self.events = events
+        self.cancel = cancel
+        self.stage = ""
+        self.started = time.perf_counter()
+        self.last_report = 0.0
+
+    def check_cancel(self):
+        if self.cancel.is_set():
+            from export_engine import ExportCancelled
+            raise ExportCancelled()
+
+    def callback(self, **changes):
+        self.check_cancel()
+        if "outputs" in changes:
+            self.events.put({"id": self.task_id, "outputs": changes["outputs"]})
+        if "stage" in changes:
+            self.stage = changes["stage"]
+            self.report(force=True)
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        self.check_cancel()
+        if bar == "chunk" and attr == "total":
+            self.stage = "audio"
+            self.report(force=True)
+        elif bar == "frame_index" and attr == "total":
+            if self.stage == "audio":
+                self.stage = "encoding"
+            self.started = time.perf_counter()
+            self.report(force=True)
+        elif attr == "index":
+            self.report()
+
+    def report(self, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last_report < REPORT_INTERVAL:
+            return
+        self.last_report = now
+        frame_bar = self.bars.get("frame_index", {})
+        total = frame_bar.get("total") or 0
+        frames = max(frame_bar.get("index", -1), 0)
+        elapsed = now - self.started
+        fps = frames / elapsed if frames and elapsed > 0 else 0.0
+        eta = (total - frames) / fps if fps and total else None
+        self.events.put({"id": self.task_id, "stage": self.stage, "frames": frames,
+                         "total_frames": total, "fps": fps, "eta": eta})
+
+def run_worker(jobs, events, cancel):
+    """Worker process: export jobs from the queue until it gets None."""
+    from export_engine import export_match
+    if hasattr(os, "setpgrp"):
+        # a process group of its own, so kill() reaches its segment pool and ffmpeg too
+        os.setpgrp()
+    while True:
+        item = jobs.get()
+        if item is None:
+            return
+        task_id, job = item
+        logger = ProgressLogger(task_id, events, cancel)
+        result = export_match(replace(job, logger=logger))
+        events.put({"id": task_id, "result": result})
+
+class ExportQueue(QObject):
+    """Queued exports for the GUI, run one after another in a worker process."""
+    task_changed = pyqtSignal(object)  # ExportTask
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.pending = deque()
+        self.running = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(POLL_INTERVAL)
+        self.timer.timeout.connect(self.poll)
+
+    def submit(self, job):
+        if not job.output_path:
+            from export_engine import default_output_path
+            # decided here so partial files can be found if the worker has to be killed
+            job.output_path = default_output_path(job.video_path, job.home_name, job.away_name)
+        task = ExportTask(job)
+        self.pending.append(task)
+        self.task_changed.emit(task)
+        self.start_next()
+        return task
+
+    def cancel(self, task):
+        if task in self.pending:
+            self.pending.remove(task)
+            task.state = "cancelled"
+            self.task_changed.emit(task)
+        elif task is self.running and task.cancel_requested is None:
+            task.cancel_requested = time.monotonic()
+            task.stage = "cancelling"
+            self.cancel_event.set()
+            self.task_changed.emit(task)
+
+    def queued(self):
+        return list(self.pending)
+
+    def start_worker(self):
+        self.jobs = self.context.Queue()
+        self.events = self.context.Queue()
+        self.cancel_event = self.context.Event()
+        # not a daemon, it starts its own pool for segment exports
+        self.process = self.context.Process(target=run_worker, args=(self.jobs, self.events, self.cancel_event),
+                                            name="export-worker")
+        self.process.start()
+
+    def start_next(self):
+        if self.running or not self.pending:
+            return
+        if self.process is None or not self.process.is_alive():
+            self.start_worker()
+        task = self.pending.popleft()
+        task.state = "running"
+        task.stage = "starting"
+        self.running = task
+        self.cancel_event.clear()
+        self.jobs.put((task.id, task.job))
+        self.timer.start()
+        self.task_changed.emit(task)
+
+    def poll(self):
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            task = self.running
+            if task is None or event["id"] != task.id:
+                continue
+            if "result" in event:
+                self.finish(task, event["result"])
+            elif "outputs" in event:
+                task.outputs = event["outputs"]
+            else:
+                task.stage = "cancelling" if task.cancel_requested else event["stage"]
+                task.frames = event["frames"]
+                task.total_frames = event["total_frames"]
+                task.fps = event["fps"]
+                task.eta = event["eta"]
+                self.task_changed.emit(task)
+        task = self.running
+        if task is None:
+            return
+        if not self.process.is_alive():
+            self.kill(task, "failed", "export worker exited")
+        elif task.cancel_requested and time.monotonic() - task.cancel_requested > CANCEL_GRACE:
+            self.kill(task, "cancelled")
+
+    def kill(self, task, state, error=None):
+        """Stop a worker that won't finish on its own and clean up after it."""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError):
+            # Windows, or the worker hasn't made its group yet
+            self.process.terminate()
+        self.process.join(5)
+        self.process = None
+        if task.job.output_path:
+            from export_engine import partial_files, segment_dirs
+            for path in partial_files(task.outputs or [task.job.output_path]):
+                if os.path.exists(path):
+                    os.remove(path)
+            for workdir in segment_dirs(task.job.output_path):
+                shutil.rmtree(workdir, ignore_errors=True)
+        self.finish(task, {"video": task.job.video_path, "output": task.job.output_path, "status": state,
+                           "error": error, "rallies": 0, "duration": 0.0, "elapsed": 0.0})
+
+    def finish(self, task, result):
+        task.result = result
+        task.state = result["status"]
+        task.eta = None
+        self.running = None
+        self.task_changed.emit(task)
+        if self.pending:
+            self.start_next()
+        else:
+            self.timer.stop()
+
+    def close(self):
+        """Drop queued exports, cancel the running one and stop the worker."""
+        for task in list(self.pending):
+            self.cancel(task)
+        if self.running:
+            self.cancel(self.running)
+            deadline = time.monotonic() + CANCEL_GRACE
+            while self.running and time.monotonic() < deadline:
+                self.poll()
+                time.sleep(POLL_INTERVAL / 1000)
+            if self.running:
+                self.kill(self.running, "cancelled")
+        if self.process is not None:
+            self.jobs.put(None)
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
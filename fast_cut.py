@@ -0,0 +1,98 @@
+"""Lossless rally cuts for exports without a scoreboard.
+
+Without an overlay there is nothing to render, so the rallies are cut out of
+the source with ffmpeg stream copy and joined with the concat demuxer. Cuts
+start on the keyframe at or before each serve, so a rally may begin a little
+early but nothing is decoded or re-encoded. The cuts are planned on the
+exact keyframe times from the seek index: a rally whose keyframe falls
+inside the previous cut is joined onto it rather than repeating footage, and
+sources whose keyframes are too sparse are re-encoded instead.
+"""
+import os
+import tempfile
+from ffmpeg_utils import run_ffmpeg, probe, FFmpegError
+
+COPYABLE_CODECS = {"h264", "hevc"}
+EXPORT_SIZE = (1920, 1080)
+# Longest lead-in (seconds) before a serve that a keyframe cut may add
+MAX_PREROLL = 3.0
+
+def copy_blocker(video_path, size=EXPORT_SIZE, clip_ranges=None, index=None, fps=None):
+    """Why the source can't be stream copied, or None if it can.
+    size and fps are what the export's profile asks for."""
+    infos = probe(video_path)
+    codec = infos.get("video_codec_name")
+    if codec not in COPYABLE_CODECS:
+        return f"{codec} video can't be copied into mp4"
+    if tuple(infos.get("video_size") or ()) != tuple(size):
+        return f"source is {infos.get('video_size')}, export is {size}"
+    source_fps = infos.get("video_fps")
+    if fps and source_fps and abs(source_fps - fps) > 0.01:
+        return f"source is {source_fps:g} fps, export is {fps:g} fps"
+    if index is None and clip_ranges and len(clip_ranges) > 1:
+        # ffmpeg would still start each cut on a keyframe, possibly inside the previous one
+        return "no seek index to plan the cuts on"
+    if index is not None and clip_ranges:
+        preroll = max(start - index.keyframe_before(start) for start, end, name in clip_ranges)
+        if preroll > MAX_PREROLL:
+            return f"keyframes are too sparse, a rally would start {preroll:.1f}s early"
+    return None
+
+def plan_cuts(clip_ranges, index=None):
+    """(start, end, name) ranges moved back to the keyframe each cut starts on.
+
+    A copied cut can only start on a keyframe, so when that keyframe is
+    before the end of the previous cut the two rallies are cut as one,
+    including the short gap between them, instead of showing the overlap twice.
+    """
+    if index is None:
+        return clip_ranges
+    cuts = []
+    for start, end, name in clip_ranges:
+        start = index.keyframe_before(start)
+        if cuts and start < cuts[-1][1]:
+            cuts[-1] = (cuts[-1][0], max(cuts[-1][1], end), name)
+        else:
+            cuts.append((start, end, name))
+    return cuts
+
+def cut_segment(video_path, start, end, segment_path, audio=True):
+    args = ["-ss", f"{start:.6f}", "-to", f"{end:.6f}", "-i", video_path, "-map", "0:v:0"]
+    args += ["-map", "0:a:0?"] if audio else ["-an"]
+    args += ["-c", "copy", "-avoid_negative_ts", "make_zero", segment_path]
+    run_ffmpeg(args)
+
+def concat_segments(segment_paths, output_path):
+    """Join segments that share codec settings without re-encoding."""
+    list_path = os.path.join(os.path.dirname(segment_paths[0]), "segments.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path, "-map", "0", "-c", "copy",
+                "-movflags", "+faststart", output_path])
+
+def stream_copy_export(video_path, clip_ranges, output_path, audio=True, index=None):
+    """Cut clip_ranges from video_path into output_path.
+
+    Raises FFmpegError if ffmpeg refuses to copy the streams.
+    """
+    clip_ranges = plan_cuts(clip_ranges, index)
+    workdir = tempfile.mkdtemp(prefix="cut-", dir=os.path.dirname(os.path.abspath(output_path)))
+    segment_paths = []
+    try:
+        for i, (start, end, name) in enumerate(clip_ranges):
+            segment_path = os.path.join(workdir, f"{i:04d}.mp4")
+            print(f"Cutting: {start}, {end}, {name}")
+            cut_segment(video_path, start, end, segment_path, audio)
+            segment_paths.append(segment_path)
+        concat_segments(segment_paths, output_path)
+    except FFmpegError:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    finally:
+        for path in os.listdir(workdir):
+            os.remove(os.path.join(workdir, path))
+        os.rmdir(workdir)
+    return probe(output_path).get("duration", 0.0)
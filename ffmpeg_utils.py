@@ -0,0 +1,29 @@
+import os
+import subprocess
+
+class FFmpegError(RuntimeError):
+    """Raised when an ffmpeg command exits with an error."""
+
+def available_cores():
+    """Cores this process may run on, to size ffmpeg and encoder threads by."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def ffmpeg_binary():
+    """moviepy's ffmpeg. moviepy takes a while to import, so it is only
+    loaded when ffmpeg is first needed rather than when the editor starts."""
+    from moviepy.config import FFMPEG_BINARY
+    return FFMPEG_BINARY
+
+def run_ffmpeg(args):
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y"] + [str(arg) for arg in args]
+    proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True)
+    if proc.returncode != 0:
+        raise FFmpegError(proc.stderr.decode(errors="replace").strip() or f"ffmpeg exited with {proc.returncode}")
+    return proc
+
+def probe(path):
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    return ffmpeg_parse_infos(path)
@@ -1,20 +1,52 @@
-import sys, os
-from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFrame, QListWidget, QMenuBar, QFileDialog, QMessageBox, QLabel, QLCDNumber, QLineEdit, QCheckBox
-from PyQt6.QtCore import Qt, QTimer, QFileInfo
+import sys
+import importlib
+import threading
+from bisect import bisect_left
+from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFrame, QListView, QMenuBar, QFileDialog, QMessageBox, QLabel, QLCDNumber, QLineEdit, QCheckBox, QComboBox
+from PyQt6.QtCore import Qt, QFileInfo, QTimer, pyqtSignal
 from PyQt6.QtGui import QAction
 import vlc
 import timeline
+from playback_sync import PlaybackSync
 import json
-from moviepy import VideoFileClip, concatenate_videoclips, TextClip, CompositeVideoClip, ImageClip, ColorClip
 from marker import Marker
+from marker_model import MarkerListModel
 from preview_popup import PreviewPopup
-from auto_upload import get_authenticated_service, upload_video
+from export_worker import ExportQueue
+from upload_queue import UploadQueue
+import seek_index
+import marker_journal
+import proxy
+import export_profiles
+from output_specs import OutputSpec
+from thumbnails import ThumbnailCache
 
 DEFAULT_IMPORT="test.mkv"
 DEFAULT_SCOREBOARD="scoreboard_base.png"
-FONT="fonts/eras-itc-bold.ttf"
+# Modules that pull in moviepy, numpy and the Google client libraries are
+# imported where they're first used, so the window shows without waiting for
+# them. Once it is up they are loaded in the background, WARM_UP_DELAY ms later.
+WARM_UP_MODULES = ["export_engine", "preview_engine", "rally_detect", "auto_upload"]
+WARM_UP_DELAY = 500
+
+def warm_up(modules=WARM_UP_MODULES):
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Couldn't preload {name}: {type(e).__name__}: {e}")
+    threading.Thread(target=run, name="warm-up", daemon=True).start()
+
+def uploads_profile(profile):
+    # drafts are only for checking the cut
+    return profile != "draft"
 
 class VideoApp(QWidget):
+    proxy_ready = pyqtSignal(str, str)  # video path, proxy path
+    rallies_detected = pyqtSignal(str, list)  # video path, proposed (ms, MarkerType) markers
+    rally_detection_failed = pyqtSignal(str, str)  # video path, error
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Embedded Player")
@@ -22,6 +54,13 @@ class VideoApp(QWidget):
 
         # TODO: create option to select scoreboard image
         self.scoreboard_path = DEFAULT_SCOREBOARD
+        self.seek_index = None
+        self.preview_engine = None
+        self.playback_path = None  # what VLC and the preview play, the video or its proxy
+        self.proxy_cancel = None
+        self.detect_cancel = None
+        self.thumbnails = None
+        self.started = False
         self.instance = vlc.Instance()
         self.player = self.instance.media_player_new()
 
@@ -46,6 +85,13 @@ class VideoApp(QWidget):
         open_action.triggered.connect(self.open_file_dialog)
         file_menu.addAction(open_action)
 
+        self.proxy_action = QAction("Use Proxy Media", self)
+        self.proxy_action.setCheckable(True)
+        self.proxy_action.setChecked(True)
+        self.proxy_action.toggled.connect(self.toggle_proxy)
+        file_menu.addAction(self.proxy_action)
+        self.proxy_ready.connect(self.use_proxy)
+
         load_action = QAction("Load Markers", self)
         load_action.triggered.connect(self.load_markers)
         file_menu.addAction(load_action)
@@ -54,10 +100,21 @@ class VideoApp(QWidget):
         save_action.triggered.connect(self.save)
         file_menu.addAction(save_action)
 
+        detect_action = QAction("Detect Rallies", self)
+        detect_action.triggered.connect(self.detect_rallies)
+        file_menu.addAction(detect_action)
+        self.rallies_detected.connect(self.add_detected_rallies)
+        self.rally_detection_failed.connect(self.show_detection_error)
+
         # Creat markers
-        self.markers = []
-        self.marker_list = QListWidget()
-        self.marker_list.itemClicked.connect(self.select_marker)
+        self.journal = None
+        self.marker_model = MarkerListModel(self)
+        self.marker_list = QListView()
+        self.marker_list.setModel(self.marker_model)
+        self.marker_list.setUniformItemSizes(True)
+        # lay rows out a batch at a time instead of all at once on every change
+        self.marker_list.setLayoutMode(QListView.LayoutMode.Batched)
+        self.marker_list.clicked.connect(lambda index: self.select_marker(self.marker_model.marker(index.row())))
 
         # create back button
         self.back_btn = QPushButton("<<")
@@ -86,11 +143,28 @@ class VideoApp(QWidget):
         self.export_btn = QPushButton("Export")
         self.export_btn.clicked.connect(self.export)
 
+        # exports run in a worker process, one after another
+        self.exports = ExportQueue(self)
+        self.exports.task_changed.connect(self.show_export_progress)
+        self.export_status = QLabel("")
+        self.cancel_export_btn = QPushButton("Cancel Export")
+        self.cancel_export_btn.setEnabled(False)
+        self.cancel_export_btn.clicked.connect(self.cancel_export)
+        self.uploads = UploadQueue(parent=self)
+        self.uploads.task_changed.connect(self.show_upload_progress)
+        self.upload_status = QLabel("")
+
         # create add score check mark
         self.add_score_check = QCheckBox("Add Scoreboard")
         self.add_score_check.setChecked(True)
         self.audio_check = QCheckBox("With audio")
         self.audio_check.setChecked(True)
+        self.profile_box = QComboBox()
+        self.profile_box.addItems(export_profiles.PROFILES)
+        self.profile_box.setCurrentText(export_profiles.DEFAULT_PROFILE)
+        # extra files made from the same decode as the rally cut
+        self.highlights_check = QCheckBox("Highlights")
+        self.sets_check = QCheckBox("File per set")
 
         # create score tracker
         self.home_score = QLabel("0")
@@ -139,16 +213,38 @@ class VideoApp(QWidget):
         main_layout.addWidget(self.preview_btn)
         main_layout.addWidget(self.add_score_check)
         main_layout.addWidget(self.audio_check)
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Export profile"))
+        profile_layout.addWidget(self.profile_box, stretch=1)
+        profile_layout.addWidget(self.highlights_check)
+        profile_layout.addWidget(self.sets_check)
+        main_layout.addLayout(profile_layout)
         main_layout.addWidget(self.export_btn)
+        export_status_layout = QHBoxLayout()
+        export_status_layout.addWidget(self.export_status, stretch=1)
+        export_status_layout.addWidget(self.cancel_export_btn)
+        main_layout.addLayout(export_status_layout)
+        main_layout.addWidget(self.upload_status)
         
-        # Timer to update slider
-        self.timer = QTimer(self)
-        self.timer.setInterval(100)  # every 100 ms
-        self.timer.timeout.connect(self.update_timeline)
-        self.timer.start()
-
+        # Follow playback through libvlc events instead of polling
+        self.sync = PlaybackSync(self.player, self.screen().refreshRate(), self)
+        self.sync.time_changed.connect(self.update_timeline)
+        self.sync.length_changed.connect(self.set_duration)
+        self.timeline.seek_requested.connect(self.sync.seek)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.started:
+            self.started = True
+            # after the first frame is on screen
+            QTimer.singleShot(0, self.start)
+
+    def start(self):
+        """Startup work that can wait until the window is showing."""
+        self.uploads.resume()
         if DEFAULT_IMPORT:
             self.auto_load()
+        QTimer.singleShot(WARM_UP_DELAY, warm_up)
     
     def open_file_dialog(self):
         # Open file picker dialog
@@ -167,21 +263,137 @@ class VideoApp(QWidget):
         
         media = self.instance.media_new(self.video_path)
         self.player.set_media(media)
+        self.playback_path = self.video_path
         self.set_timeline_and_fps()
         self.toggle_play()
-        dirname = os.path.dirname(self.video_path)
-        stem = os.path.splitext(os.path.basename(self.video_path))[0]
-
-        marks_path = os.path.join(dirname, f"{stem}_marks.json")
-        print(f"Attempting to find markers at {marks_path}")
-        self.load_markers(marks_path)
+        self.index_video()
+        self.make_proxy()
+        self.load_thumbnails()
+        self.open_journal()
     
     def auto_load(self):
         self.video_path=DEFAULT_IMPORT
         media = self.instance.media_new(self.video_path)
         self.player.set_media(media)
+        self.playback_path = self.video_path
         self.set_timeline_and_fps()
         self.toggle_play()
+        self.index_video()
+        self.make_proxy()
+        self.load_thumbnails()
+        self.open_journal()
+
+    def make_proxy(self):
+        """Switch playback to the video's proxy once it has been built."""
+        if self.proxy_cancel:
+            self.proxy_cancel.set()
+            self.proxy_cancel = None
+        if not self.proxy_action.isChecked():
+            return
+        video_path = self.video_path
+        # the callback runs on the proxy thread, the signal moves it to the GUI thread
+        self.proxy_cancel = proxy.load_or_build_in_background(video_path, lambda path: self.proxy_ready.emit(video_path, path))
+
+    def load_thumbnails(self):
+        if self.thumbnails:
+            self.thumbnails.close()
+        self.thumbnails = ThumbnailCache(self.video_path, self.playback_path, self)
+        self.timeline.set_thumbnails(self.thumbnails)
+
+    def use_proxy(self, video_path, proxy_path):
+        if video_path == self.video_path and self.proxy_action.isChecked():
+            print(f"Playing proxy {proxy_path}")
+            self.set_playback(proxy_path)
+
+    def toggle_proxy(self, checked):
+        if checked:
+            self.make_proxy()
+        else:
+            if self.proxy_cancel:
+                self.proxy_cancel.set()
+                self.proxy_cancel = None
+            if self.playback_path != self.video_path:
+                self.set_playback(self.video_path)
+
+    def set_playback(self, path):
+        """Play path from the current time, keeping play/pause as it was.
+        The proxy and the video share timestamps, so markers stay put."""
+        t = self.sync.time
+        media = self.instance.media_new(path)
+        media.add_option(f":start-time={t / 1000}")
+        if not self.player.is_playing():
+            media.add_option(":start-paused")
+        self.player.set_media(media)
+        self.player.play()
+        self.playback_path = path
+        if self.thumbnails:
+            self.thumbnails.decode_path = path
+
+    def open_journal(self):
+        """Restore the video's markers from its snapshot and journal, and
+        autosave every change to them from here on."""
+        if self.journal:
+            self.journal.close()
+        print(f"Attempting to find markers at {marker_journal.snapshot_path(self.video_path)}")
+        marks, seq = marker_journal.replay(self.video_path)
+        self.journal = marker_journal.MarkerJournal(self.video_path, marks, seq)
+        self.marker_model.set_marks(marks)
+        print(f"Loaded {len(self.marker_model.marks)} items")
+        self.timeline.set_markers(self.marker_model.marks)
+        self.update_score()
+
+    def index_video(self):
+        self.seek_index = None
+        video_path = self.video_path
+        seek_index.load_or_build_in_background(video_path, lambda index: self.set_seek_index(video_path, index))
+
+    def set_seek_index(self, video_path, index):
+        # called from the indexing thread, ignore it if another video was opened since
+        if video_path == self.video_path:
+            self.seek_index = index
+            if self.preview_engine and self.preview_engine.video_path == video_path:
+                self.preview_engine.index = index
+
+    def detect_rallies(self):
+        """Propose Serve / No point markers from the audio, in the background."""
+        if self.detect_cancel:
+            self.detect_cancel.set()
+        video_path = self.video_path
+        print(f"Detecting rallies in {video_path}")
+        import rally_detect
+        self.detect_cancel = rally_detect.detect_in_background(
+            video_path, lambda markers: self.rallies_detected.emit(video_path, markers),
+            lambda error: self.rally_detection_failed.emit(video_path, error))
+
+    def show_detection_error(self, video_path, error):
+        self.detect_cancel = None
+        if video_path == self.video_path:
+            QMessageBox.warning(self, "Detect Rallies", f"Couldn't detect rallies: {error}")
+
+    def add_detected_rallies(self, video_path, markers):
+        self.detect_cancel = None
+        if video_path != self.video_path:
+            return
+        # skip rallies that already have a marker in them
+        marked = [t for t, _ in self.marker_model.marks]
+        new = []
+        for serve, end in zip(markers[0::2], markers[1::2]):
+            if bisect_left(marked, serve[0] - 1000) == bisect_left(marked, end[0] + 1000):
+                new += [serve, end]
+        if not new:
+            QMessageBox.information(self, "Detect Rallies", "No new rallies found.")
+            return
+        reply = QMessageBox.question(
+            self, "Detect Rallies",
+            f"Add {len(new) // 2} proposed rallies? Each one gets a Serve and a No point marker to check and change to the winner's point.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        for t, name in new:
+            self.marker_model.add(t, name)
+            self.journal.add(t, name)
+        self.timeline.set_markers(self.marker_model.marks)
+        self.update_score()
 
     def toggle_play(self):
         if self.player.is_playing():
@@ -200,23 +412,26 @@ class VideoApp(QWidget):
         if not file_path:
             return
 
-        self.markers = []
-        self.marker_list.clear()
         with open(file_path, "r", encoding="utf-8") as f:
             loaded = json.load(f)
             marks = loaded["marks"]
-            for mark in marks:
-                marker_obj = Marker(Marker.MarkerType(mark["label"]),mark["time"])
-                self.markers.append(marker_obj)
-                self.marker_list.addItem(marker_obj)
-        print(f"Loaded {len(self.markers)} items from {file_path}")
-        self.timeline.set_markers(self.markers)
+            self.marker_model.set_marks((mark["time"], Marker.MarkerType(mark["label"])) for mark in marks)
+        print(f"Loaded {len(self.marker_model.marks)} items from {file_path}")
+        if self.journal:
+            self.journal.reset(self.marker_model.marks)
+        self.timeline.set_markers(self.marker_model.marks)
+        self.update_score()
     def save(self):
         file_path, _ = QFileDialog.getSaveFileName(
             self, "Save File", "", "JSON Files (*.json);;All Files (*)"
         )
         if not file_path:
             return
+        if self.journal and marker_journal.is_snapshot(self.video_path, file_path):
+            # written by the journal, so the snapshot's seq matches the records after it
+            self.journal.reset(self.marker_model.marks)
+            print(f"Saved {len(self.marker_model.marks)} items to {file_path}")
+            return
         formatted_markers = self.format_markers()
         output = {
             "file": self.video_path,
@@ -224,172 +439,116 @@ class VideoApp(QWidget):
         }
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(output, f, indent=2)
-        print(f"Saved {len(self.markers)} items to {file_path}")
+        print(f"Saved {len(formatted_markers)} items to {file_path}")
     def format_markers(self):
         output = []
-        for marker in self.markers:
+        for timestamp, marker_type in self.marker_model.marks:
             output.append({
-                "time": marker.timestamp,
-                "label": marker.marker_type
+                "time": timestamp,
+                "label": marker_type
             })
         return output
     def back(self):
         current_time = self.player.get_time()  # milliseconds
         seek_time = max(0, current_time - 5000)
-        self.player.set_time(seek_time)
+        self.sync.seek(seek_time)
 
     
     def make_scoreboard_composite(self, video_clip, scoreboard_type, position=("center", 20)):
-        w, h = video_clip.size
-        if scoreboard_type=="text":
-            overlay = self.create_text_scoreboard(w, video_clip.duration, 0, 0)
-        else:
-            overlay = [ImageClip(self.scoreboard_path).resized(height=h/8).with_position(position)]
-        final = CompositeVideoClip([video_clip] + overlay)
-        return final
+        import scoreboard
+        return scoreboard.make_scoreboard_composite(video_clip, scoreboard_type, self.home.text(), self.away.text(), self.scoreboard_path, position)
 
     def create_text_scoreboard(self, width, duration, home, away):
-        # Create text overlay
-        # Define common parameters
-        font_size = 60
-        color = 'white'
-        print(f'duration: {duration} score: {home}:{away}')
-        # Individual text clips
-        team1_clip = TextClip(text=self.home.text(), font=FONT, font_size=font_size, color=color, duration=duration, method="caption", size=(600, font_size+20), horizontal_align="right")
-        team2_clip = TextClip(text=self.away.text(), font=FONT, font_size=font_size, color=color, duration=duration, method="caption", size=(600, font_size+20), horizontal_align="left")
-        score_clip = TextClip(text=f"{home}:{away}", font=FONT, font_size=font_size, color=color, duration=duration, method="caption", size=(600, font_size+20), text_align="center")
-        
-        # Create background color
-        bar_height = 60
-        bar = ColorClip(size=(width, bar_height), color=(0, 0, 0), duration=duration).with_opacity(0.5)
-        
-
-        # Get widths to align around center
-        w_team1, h = team1_clip.size
-        w_score, _ = score_clip.size
-        w_team2, _ = team2_clip.size
-
-        # Horizontal spacing (adjust as needed)
-        gap = 30
-
-        # Position so that the score (with colon) is centered horizontally
-        team1_x = width/2 - (w_score/2 + gap + w_team1)
-        score_x = width/2 - w_score/2
-        team2_x = width/2 + (w_score/2 + gap)
-        # Vertically near the top
-        y_pos = 0
-
-        # Create positioned clips
-        team1_clip = team1_clip.with_position((team1_x, y_pos))
-        score_clip = score_clip.with_position((score_x, y_pos))
-        team2_clip = team2_clip.with_position((team2_x, y_pos))
-        bar = bar.with_position((0, y_pos+20))
-        return [bar, team1_clip, team2_clip, score_clip]
+        import scoreboard
+        return scoreboard.create_text_scoreboard(width, duration, self.home.text(), self.away.text(), home, away)
 
     def export(self):
-        get_authenticated_service()
+        profile = self.profile_box.currentText()
+        if uploads_profile(profile):
+            # log in before exporting, the finished export is uploaded from here
+            self.uploads.authenticate()
         print("\n\n\nStarting export...")
-        add_score=self.add_score_check.isChecked()
-        clip_ranges = []
-        current_start = None
-        
-        output_path = f"{self.creation_time}-{self.home.text().replace("/","_")}-{self.away.text().replace("/","_")}.mp4"
-        print(f"Exporting to {output_path}")
-        
-        found_first_serve=False
-        home = 0
-        away = 0
-        for marker in sorted(self.markers):
-            t = round(marker.timestamp/1000, 1)
-            name = marker.marker_type
-            # get score before first serve (in case starts recording after 0-0)
-            if not found_first_serve:
-                if name == Marker.MarkerType.HOME_PT:
-                    home += 1
-                elif name == Marker.MarkerType.AWAY_PT:
-                    away += 1
-                elif name == Marker.MarkerType.SERVE:
-                    found_first_serve = True
-                    current_start = t
-            else:
-                if name == Marker.MarkerType.SERVE:
-                    current_start = t
-                else:
-                    if current_start: 
-                        print(f"Appending: {current_start}, {t}, {name} ")
-                        clip_ranges.append((current_start, t, name))
-                        current_start = None
-                    else:
-                        print(f"{name} at timestamp {t} doesn't have start serve.")
-                        return
-
-        
-        video = VideoFileClip(self.video_path, audio=self.audio_check.isChecked())
-        video = video.resized((1920,1080))
-        print(f'subclips: {clip_ranges}')
-        subclips = []
-        for start, end, name in clip_ranges:
-            clip = video.subclipped(start, end)
-            print(f"Name: {name}")
-            
-            w, h = clip.size
-            # Combine all
-            scoreboard = CompositeVideoClip([clip]+ self.create_text_scoreboard(w, clip.duration, home, away)) if add_score else clip
-
-            subclips.append(scoreboard)
-            if name == Marker.MarkerType.HOME_PT:
-                home += 1
-            elif name == Marker.MarkerType.AWAY_PT:
-                away += 1
-        final = concatenate_videoclips(subclips)
-
-        final.write_videofile(output_path, fps=30, codec='libx264', threads=4)
-        video.close()
-
-        upload_video(output_path)
+        from export_engine import ExportJob
+        from ffmpeg_utils import available_cores
+        job = ExportJob(
+            video_path=self.video_path,
+            marks=list(self.marker_model.marks),
+            home_name=self.home.text(),
+            away_name=self.away.text(),
+            add_score=self.add_score_check.isChecked(),
+            audio=self.audio_check.isChecked(),
+            profile=profile,
+            outputs=self.export_outputs(),
+            segment_workers=available_cores())
+        self.exports.submit(job)
+
+    def export_outputs(self):
+        extra = []
+        if self.highlights_check.isChecked():
+            extra.append(OutputSpec("highlights"))
+        if self.sets_check.isChecked():
+            extra.append(OutputSpec("sets"))
+        return [OutputSpec("match")] + extra if extra else None
+
+    def show_export_progress(self, task):
+        if task.result:
+            from export_engine import format_result
+            print(format_result(task.result))
+            if task.state == "done" and uploads_profile(task.job.profile):
+                # uploads while the worker moves on to the next export
+                titles = task.result.get("titles", {})
+                for path in task.result.get("outputs") or [task.job.output_path]:
+                    self.uploads.submit(path, titles.get(path))
+        running = self.exports.running
+        text = running.describe() if running else task.describe()
+        queued = len(self.exports.queued())
+        if queued:
+            text += f" ({queued} queued)"
+        self.export_status.setText(text)
+        self.cancel_export_btn.setEnabled(running is not None)
+
+    def show_upload_progress(self, task):
+        pending = self.uploads.pending()
+        text = task.describe()
+        if len(pending) > 1:
+            text += f" ({len(pending)} uploads pending)"
+        self.upload_status.setText(text)
+
+    def cancel_export(self):
+        if self.exports.running:
+            self.exports.cancel(self.exports.running)
 
     def show_preview(self):
         start = self.player.get_time()/1000
-        video_clip = VideoFileClip(self.video_path, audio=self.audio_check.isChecked()
-                                   )
-        video_clip = video_clip.resized((1920,1080))
-        video_clip = video_clip.subclipped(start, start+10)
-        popup = PreviewPopup(self.make_scoreboard_composite(video_clip, "text", 10))
+        # kept open between previews of the same video
+        if self.preview_engine is None or self.preview_engine.video_path != self.playback_path:
+            if self.preview_engine:
+                self.preview_engine.close()
+            # the proxy seeks fast on its own, the seek index is for the source video
+            index = self.seek_index if self.playback_path == self.video_path else None
+            from preview_engine import PreviewEngine
+            self.preview_engine = PreviewEngine(self.playback_path, index=index)
+        self.preview_engine.set_scoring(self.home.text(), self.away.text(), self.marker_model.marks)
+        popup = PreviewPopup(self.preview_engine, start)
         popup.exec()
 
     def set_timeline_and_fps(self):
-        
+        # the real duration arrives with libvlc's length changed event
         self.timeline.set_duration(1)  # default to avoid div by zero
-        self.duration_timer = QTimer(self)
-        self.duration_timer.setInterval(100)  # check every 100ms
-        self.duration_timer.timeout.connect(self.check_duration)
-        self.duration_timer.start()
-
-    def check_duration(self):
-        dur = self.player.get_length()
-        if dur > 0:
-            self.timeline.set_duration(dur)
-            self.fps = self.player.get_fps()
-            self.duration_timer.stop()  # stop polling
-
-    def init_duration(self):
-        self.timeline.duration = self.player.get_length()
-    def update_timeline(self):
-        pos = self.player.get_time()         # Current time in ms
+
+    def set_duration(self, dur):
+        self.timeline.set_duration(dur)
+        self.fps = self.player.get_fps()
+
+    def update_timeline(self, pos=None):
+        if pos is None:
+            pos = self.player.get_time()         # Current time in ms
         self.timeline.set_position(pos)
-        self.update_score()
-    def update_score(self):
-        pos = self.player.get_time()
-        home = 0
-        away = 0
-        for marker in self.markers:
-            t = marker.timestamp
-            name = marker.marker_type
-            if t < pos:
-                if name == Marker.MarkerType.HOME_PT:
-                    home += 1
-                elif name == Marker.MarkerType.AWAY_PT:
-                    away += 1
+        self.update_score(pos)
+    def update_score(self, pos=None):
+        if pos is None:
+            pos = self.sync.time
+        home, away = self.marker_model.marks.score_at(pos)
         self.home_score.setText(str(home))
         self.away_score.setText(str(away))
 
@@ -401,39 +560,48 @@ class VideoApp(QWidget):
             print("Error setting position:", e)
     def add_marker(self, name):
         t = self.player.get_time()
-        new_marker = Marker(name, t)
-        self.markers.append(new_marker)
-        # insert into marker_list based on t
-        self.marker_list.insertItem(sorted(self.markers).index(new_marker), new_marker)
-
-        self.timeline.set_markers(self.markers)
+        self.marker_model.add(t, name)
+        self.journal.add(t, name)
+        self.timeline.set_markers(self.marker_model.marks)
+        self.update_score()
     def select_marker(self, marker):
-        print(f"Move to marker: {marker.text()}")
+        print(f"Move to marker: {marker}")
         print(f"marker.timestamp: {marker.timestamp} ({type(marker.timestamp)})")
-        self.player.set_time(marker.timestamp)
+        self.sync.seek(marker.timestamp)
     
     def delete_selected_markers(self):
-        selected_markers = self.marker_list.selectedItems()
+        selected_rows = [index.row() for index in self.marker_list.selectionModel().selectedRows()]
 
-        if not selected_markers:
+        if not selected_rows:
             print("No markers selected to delete.")
             return
-        for marker in selected_markers:
-            row = self.marker_list.row(marker)
-            self.marker_list.takeItem(row)
-            self.markers.remove(marker)
-            del marker
+        for timestamp, marker_type in self.marker_model.remove_rows(selected_rows):
+            self.journal.remove(timestamp, marker_type)
+        self.timeline.set_markers(self.marker_model.marks)
+        self.update_score()
 
     def closeEvent(self, event):
         # Show a confirmation dialog
         reply = QMessageBox.question(
             self,
             "Confirm Exit",
-            "Are you sure you want to exit?",
+            "An export is still running and will be cancelled. Exit anyway?" if self.exports.running else "Are you sure you want to exit?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
 
         if reply == QMessageBox.StandardButton.Yes:
+            if self.journal:
+                self.journal.close()
+            self.exports.close()
+            self.uploads.close()
+            if self.preview_engine:
+                self.preview_engine.close()
+            if self.proxy_cancel:
+                self.proxy_cancel.set()
+            if self.detect_cancel:
+                self.detect_cancel.set()
+            if self.thumbnails:
+                self.thumbnails.close()
             event.accept()  # Close the window
         else:
             event.ignore()  # Ignore the close request
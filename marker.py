@@ -1,14 +1,9 @@
-from PyQt6.QtWidgets import QListWidgetItem
-from enum import Enum
+from marker_type import MarkerType
 
-class Marker(QListWidgetItem):
-    class MarkerType(str, Enum):
-        SERVE = "Serve"
-        NO_PT = "No point"
-        HOME_PT = "Home point"
-        AWAY_PT = "Away point"
+class Marker:
+    MarkerType = MarkerType
+    __slots__ = ("marker_type", "timestamp")
     def __init__(self, name:str, timestamp: float):
-        super().__init__(f"{round(timestamp/1000, 2)} - {name.value}")
         self.marker_type = name
         self.timestamp = int(timestamp)
     def __str__(self):
@@ -0,0 +1,164 @@
+"""Crash-safe autosave for markers.
+
+Every add and delete is appended to <stem>_marks.journal next to the video
+as one JSON line. A writer thread does the file work, so the UI only puts
+records on a queue: lines are written as they arrive and fsynced at most
+every FSYNC_INTERVAL seconds. Once enough records pile up, the writer
+compacts them into the usual {"file", "marks"} snapshot (<stem>_marks.json)
+and empties the journal.
+
+Records and snapshots carry a sequence number, so a crash between writing
+the snapshot and emptying the journal can't replay a record twice. A line
+torn by a crash is cut off before the writer appends to the journal again.
+"""
+import os
+import json
+import time
+import queue
+import threading
+from marker_type import MarkerType
+from score_index import ScoreIndex
+import sidecar
+
+FSYNC_INTERVAL = 0.5
+COMPACT_EVERY = 500
+
+def snapshot_path(video_path):
+    return sidecar.sidecar_path(video_path, "marks.json")
+
+def journal_path(video_path):
+    return sidecar.sidecar_path(video_path, "marks.journal")
+
+def is_snapshot(video_path, path):
+    """Whether path is the video's autosave snapshot."""
+    return os.path.abspath(path) == os.path.abspath(snapshot_path(video_path))
+
+def drop_torn_tail(path):
+    """Cut the journal back to its last complete line, so new records don't
+    start in the middle of one that replay() skips."""
+    try:
+        with open(path, "r+b") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+def apply(marks, record):
+    if record["op"] == "add":
+        marks.add(record["time"], MarkerType(record["label"]))
+    elif record["op"] == "del":
+        try:
+            marks.remove(record["time"], MarkerType(record["label"]))
+        except ValueError:
+            pass
+
+def replay(video_path):
+    """(marks, seq): the snapshot plus the journal records written after it."""
+    seq = 0
+    marks = ScoreIndex()
+    try:
+        with open(snapshot_path(video_path), "r", encoding="utf-8") as f:
+            loaded = json.load(f)
+        marks = ScoreIndex((mark["time"], MarkerType(mark["label"])) for mark in loaded["marks"])
+        seq = loaded.get("seq", 0)
+    except FileNotFoundError:
+        pass
+    try:
+        with open(journal_path(video_path), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn last write
+                if record["n"] > seq:
+                    apply(marks, record)
+                    seq = record["n"]
+    except FileNotFoundError:
+        pass
+    return marks, seq
+
+class MarkerJournal:
+    """Journal writer for one video, starting from the replayed (marks, seq)."""
+    def __init__(self, video_path, marks=(), seq=0, fsync_interval=FSYNC_INTERVAL, compact_every=COMPACT_EVERY):
+        self.video_path = video_path
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        # what is on disk, only touched by the writer thread
+        self.marks = ScoreIndex(marks)
+        self.seq = seq
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # --- UI thread ---
+    def add(self, timestamp, marker_type):
+        self.queue.put({"op": "add", "time": int(timestamp), "label": marker_type.value})
+
+    def remove(self, timestamp, marker_type):
+        self.queue.put({"op": "del", "time": int(timestamp), "label": marker_type.value})
+
+    def reset(self, marks):
+        """Replace every marker, e.g. after loading a marks file."""
+        self.queue.put({"op": "reset", "marks": list(marks)})
+
+    def close(self):
+        """Write out everything queued, compact and stop the writer."""
+        self.queue.put(None)
+        self.thread.join()
+
+    # --- writer thread ---
+    def run(self):
+        drop_torn_tail(journal_path(self.video_path))
+        journal = open(journal_path(self.video_path), "a", encoding="utf-8")
+        pending = 0       # records in the journal since the last compaction
+        dirty = False     # written but not fsynced
+        last_sync = time.monotonic()
+        while True:
+            try:
+                record = self.queue.get(timeout=self.fsync_interval if dirty else None)
+            except queue.Empty:
+                os.fsync(journal.fileno())
+                last_sync = time.monotonic()
+                dirty = False
+                continue
+            if record is None:
+                break
+            self.seq += 1
+            if record["op"] == "reset":
+                self.marks = ScoreIndex(record["marks"])
+                journal = self.compact(journal)
+                pending, dirty = 0, False
+                continue
+            record["n"] = self.seq
+            apply(self.marks, record)
+            journal.write(json.dumps(record) + "\n")
+            journal.flush()
+            pending += 1
+            dirty = True
+            if pending >= self.compact_every:
+                journal = self.compact(journal)
+                pending, dirty = 0, False
+            elif time.monotonic() - last_sync >= self.fsync_interval:
+                os.fsync(journal.fileno())
+                last_sync = time.monotonic()
+                dirty = False
+        self.compact(journal).close()
+
+    def compact(self, journal):
+        """Write the snapshot, then start an empty journal."""
+        output = {
+            "file": self.video_path,
+            "seq": self.seq,
+            "marks": [{"time": timestamp, "label": marker_type.value} for timestamp, marker_type in self.marks]
+        }
+        path = snapshot_path(self.video_path)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(output, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        journal.close()
+        journal = open(journal_path(self.video_path), "w", encoding="utf-8")
+        os.fsync(journal.fileno())
+        return journal
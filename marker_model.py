@@ -0,0 +1,48 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from marker import Marker
+from score_index import ScoreIndex
+
+class MarkerListModel(QAbstractListModel):
+    """List model over the markers, in time order.
+
+    The markers live in a ScoreIndex as plain (timestamp, MarkerType) pairs; row
+    text and Marker objects are only made when the view asks for a row.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.marks = ScoreIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.marks)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return str(self.marker(index.row()))
+
+    def marker(self, row):
+        timestamp, marker_type = self.marks[row]
+        return Marker(marker_type, timestamp)
+
+    def set_marks(self, marks):
+        """Replace all markers with (timestamp, MarkerType) pairs."""
+        self.beginResetModel()
+        self.marks = ScoreIndex(marks)
+        self.endResetModel()
+
+    def add(self, timestamp, marker_type):
+        """Add a marker and return its row."""
+        row = self.marks.insert_position(timestamp, marker_type)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.marks.add(timestamp, marker_type)
+        self.endInsertRows()
+        return row
+
+    def remove_rows(self, rows):
+        """Remove rows and return the (timestamp, MarkerType) pairs they held."""
+        removed = []
+        for row in sorted(rows, reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            removed.append(self.marks.pop(row))
+            self.endRemoveRows()
+        return removed
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class MarkerType(str, Enum):
+    SERVE = "Serve"
+    NO_PT = "No point"
+    HOME_PT = "Home point"
+    AWAY_PT = "Away point"
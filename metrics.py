@@ -0,0 +1,172 @@
+"""Timings and counters for one export, written out as a JSON report.
+
+An ExportMetrics travels with the ExportJob. The pipeline wraps each stage
+in metrics.stage(name), counts what it processed with metrics.count(), and
+calls metrics.rally(i) as the output reaches each rally, which gives the
+time spent per rally including encoding. At the end export_match writes
+<output stem>_metrics.json next to the export.
+
+Set EXPORT_PROFILE=1 in the environment to also run each export under
+cProfile and save <output stem>.prof next to it (open it with pstats or
+snakeviz).
+"""
+import os, sys
+import json
+import time
+import cProfile
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_ENV = "EXPORT_PROFILE"
+
+def report_path(output_path):
+    return os.path.splitext(output_path)[0] + "_metrics.json"
+
+def profile_path(output_path):
+    return os.path.splitext(output_path)[0] + ".prof"
+
+def profiling_enabled():
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+class ExportMetrics:
+    def __init__(self):
+        self.stages = {}        # name -> seconds, summed over every time it ran
+        self.counters = {}
+        self.info = {}          # e.g. source and output size
+        self.rallies = []       # [index, seconds]
+        self.current_rally = None
+        self.rally_started = None
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    @contextmanager
+    def stage_excluding(self, name, *inner):
+        """Like stage, minus the time the inner stages record meanwhile. For
+        encoding, which pulls each frame through decode and composite."""
+        before = sum(self.stages.get(n, 0.0) for n in inner)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            inner_time = sum(self.stages.get(n, 0.0) for n in inner) - before
+            self.add_time(name, time.perf_counter() - started - inner_time)
+
+    def add_time(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def rally(self, i):
+        """The output has moved on to rally i."""
+        if i == self.current_rally:
+            return
+        self.end_rally()
+        self.current_rally = i
+        self.rally_started = time.perf_counter()
+
+    def end_rally(self):
+        if self.current_rally is not None:
+            self.rallies.append([self.current_rally, time.perf_counter() - self.rally_started])
+            self.current_rally = None
+
+    def snapshot(self):
+        self.end_rally()
+        return {"stages": dict(self.stages), "counters": dict(self.counters), "info": dict(self.info),
+                "rallies": list(self.rallies)}
+
+    def merge(self, snapshot, rally_offset=0):
+        """Add in what a worker process measured for rallies rally_offset onwards."""
+        for name, seconds in snapshot["stages"].items():
+            self.add_time(name, seconds)
+        for name, n in snapshot["counters"].items():
+            self.count(name, n)
+        self.info.update(snapshot["info"])
+        self.rallies += [[rally_offset + i, seconds] for i, seconds in snapshot["rallies"]]
+
+    def report(self, result, clip_ranges=()):
+        self.end_rally()
+        rallies = []
+        for i, seconds in sorted(self.rallies):
+            start, end = clip_ranges[i][:2] if i < len(clip_ranges) else (None, None)
+            rallies.append({"rally": i, "start": start, "end": end, "seconds": round(seconds, 4)})
+        output = result.get("output")
+        return {
+            "result": result,
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+            "info": dict(self.info),
+            "source_bytes": file_size(result.get("video")),
+            "output_bytes": file_size(output),
+            **resource_usage(),
+            "rallies": rallies,
+            "profile": profile_path(output) if output and profiling_enabled() else None,
+        }
+
+    def write_report(self, result, clip_ranges=()):
+        path = report_path(result["output"])
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(result, clip_ranges), f, indent=2)
+        except OSError as e:
+            print(f"Couldn't write {path}: {e}")
+            return None
+        return path
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return None
+
+def resource_usage():
+    """Peak RSS and disk I/O of this process and the ffmpeg processes it has
+    waited for, over the life of the process."""
+    if resource is None:
+        return {"peak_rss_mb": None, "children_peak_rss_mb": None, "disk_read_bytes": None, "disk_write_bytes": None}
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    rss_unit = 1 if sys.platform == "darwin" else 1024  # bytes on macOS, KB elsewhere
+    return {
+        "peak_rss_mb": round(own.ru_maxrss * rss_unit / 2**20, 1),
+        "children_peak_rss_mb": round(children.ru_maxrss * rss_unit / 2**20, 1),
+        # block counts are in 512 byte units and only include real disk traffic, not the page cache
+        "disk_read_bytes": (own.ru_inblock + children.ru_inblock) * 512,
+        "disk_write_bytes": (own.ru_oublock + children.ru_oublock) * 512,
+    }
+
+def update_report(output_path, **fields):
+    """Add fields (e.g. the upload's timing) to an export's existing report."""
+    path = report_path(output_path)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        report.update(fields)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    except (OSError, ValueError):
+        pass
+
+def start_profile():
+    """A running cProfile.Profile if EXPORT_PROFILE is set, else None."""
+    if not profiling_enabled():
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def stop_profile(profiler, output_path):
+    if profiler is None:
+        return
+    profiler.disable()
+    if output_path:
+        profiler.dump_stats(profile_path(output_path))
@@ -0,0 +1,90 @@
+"""Which rallies go into each file of a multi-output export.
+
+An export can produce several files from one recording, e.g. the full rally
+cut, a highlights reel and one file per set. Each OutputSpec picks rallies
+out of the match's clip_ranges and the score to show during each one; the
+export then decodes every needed source frame once and hands it to all the
+files that use it (see export_engine.render_outputs).
+
+Specs are written as "match", "highlights:8" (the 8 longest rallies) or
+"sets:25" (a set ends when a side reaches 25 points, 2 ahead), separated by
+commas on the command line.
+"""
+import os
+from dataclasses import dataclass
+
+HIGHLIGHT_COUNT = 10
+SET_POINTS = 25
+KINDS = ("match", "highlights", "sets")
+
+@dataclass(frozen=True)
+class OutputSpec:
+    kind: str = "match"
+    value: int = None           # highlights: rallies kept, sets: points to win a set
+
+@dataclass
+class PlannedOutput:
+    path: str
+    rallies: list               # indices into the match's clip_ranges, in match order
+    scores: list                # (home, away) shown during each of those rallies
+    title: str = ""             # for the upload
+
+def parse_specs(text):
+    """OutputSpecs from "match,highlights:8,sets", None for an empty string."""
+    if not text:
+        return None
+    specs = []
+    for part in text.split(","):
+        kind, _, value = part.strip().partition(":")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown output {kind!r}, expected one of {', '.join(KINDS)}")
+        specs.append(OutputSpec(kind, int(value) if value else None))
+    return specs
+
+def output_path(match_path, name):
+    if not name:
+        return match_path
+    stem, ext = os.path.splitext(match_path)
+    return f"{stem}_{name}{ext}"
+
+def longest_rallies(clip_ranges, count):
+    """Indices of the count longest rallies, in match order."""
+    by_length = sorted(range(len(clip_ranges)), key=lambda i: clip_ranges[i][1] - clip_ranges[i][0], reverse=True)
+    return sorted(by_length[:count])
+
+def split_sets(scores, set_points):
+    """Rally indices of each set, from the score before every rally.
+
+    A set is over once a side has set_points points in it and leads by 2;
+    the last set runs to the end. Returns [(first rally, end rally, score
+    when the set started)].
+    """
+    sets = []
+    first, start_score = 0, (0, 0)
+    for i in range(1, len(scores)):
+        home = scores[i][0] - start_score[0]
+        away = scores[i][1] - start_score[1]
+        if max(home, away) >= set_points and abs(home - away) >= 2:
+            sets.append((first, i, start_score))
+            first, start_score = i, scores[i]
+    if first < len(scores):
+        sets.append((first, len(scores), start_score))
+    return sets
+
+def plan_outputs(specs, match_path, clip_ranges, scores, title=""):
+    """PlannedOutputs for specs, named after the match's output path and titled after the match's title."""
+    outputs = []
+    for spec in specs:
+        if spec.kind == "match":
+            outputs.append(PlannedOutput(output_path(match_path, ""), list(range(len(clip_ranges))), list(scores), title))
+        elif spec.kind == "highlights":
+            rallies = longest_rallies(clip_ranges, spec.value or HIGHLIGHT_COUNT)
+            outputs.append(PlannedOutput(output_path(match_path, "highlights"), rallies, [scores[i] for i in rallies],
+                                         f"{title} Highlights".strip()))
+        elif spec.kind == "sets":
+            for n, (first, end, (home_start, away_start)) in enumerate(split_sets(scores, spec.value or SET_POINTS), 1):
+                # the scoreboard counts the set's own points
+                outputs.append(PlannedOutput(output_path(match_path, f"set{n}"), list(range(first, end)),
+                                             [(home - home_start, away - away_start) for home, away in scores[first:end]],
+                                             f"{title} Set {n}".strip()))
+    return outputs
@@ -0,0 +1,87 @@
+import numpy as np
+
+class Overlay:
+    """RGBA image blended into a fixed region of every frame.
+
+    The image is premultiplied and cropped to its visible pixels once, so
+    blending only touches the band the overlay actually covers instead of
+    compositing the full frame.
+    """
+    def __init__(self, rgba, x=0, y=0):
+        rgba = np.asarray(rgba)
+        alpha = rgba[:, :, 3]
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if len(rows) == 0:
+            rgba = rgba[:0, :0]
+        else:
+            rgba = rgba[rows[0]:rows[-1]+1, cols[0]:cols[-1]+1]
+            x += int(cols[0])
+            y += int(rows[0])
+        self.x = int(x)
+        self.y = int(y)
+        self.height, self.width = rgba.shape[:2]
+
+        alpha = rgba[:, :, 3:4].astype(np.uint16)
+        self.premultiplied = ((rgba[:, :, :3] * alpha + 127) // 255).astype(np.uint16)
+        self.inverse_alpha = 255 - alpha
+
+    @classmethod
+    def from_clip(cls, clip, frame_size, position=(0, 0), t=0):
+        """Overlay from a still clip, placed like clip.with_position(position)."""
+        rgb = clip.get_frame(t)
+        if clip.mask is not None:
+            alpha = np.round(clip.mask.get_frame(t) * 255)
+        else:
+            alpha = np.full(rgb.shape[:2], 255)
+        w, h = clip.size
+        x, y = resolve_position(position, frame_size, (w, h))
+        return cls(np.dstack([rgb, alpha]).astype(np.uint8), x, y)
+
+    def blend(self, frame):
+        """Alpha-blend into frame in place and return it.
+
+        Read-only frames (straight from the decoder) are copied first.
+        """
+        if not frame.flags.writeable:
+            frame = frame.copy()
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(self.x, 0), max(self.y, 0)
+        x1, y1 = min(self.x + self.width, frame_w), min(self.y + self.height, frame_h)
+        if x0 >= x1 or y0 >= y1:
+            return frame
+        src = (slice(y0 - self.y, y1 - self.y), slice(x0 - self.x, x1 - self.x))
+        region = frame[y0:y1, x0:x1, :3]
+
+        # dst * (255 - a) / 255 rounded, using the shift trick instead of a division
+        blended = region * self.inverse_alpha[src]
+        blended += 128
+        blended += blended >> 8
+        blended >>= 8
+        blended += self.premultiplied[src]
+        np.minimum(blended, 255, out=blended)
+        region[...] = blended
+        return frame
+
+def resolve_position(position, frame_size, size):
+    """Top-left corner for a moviepy-style position such as ("center", 20)."""
+    frame_w, frame_h = frame_size
+    w, h = size
+    x, y = position if isinstance(position, (tuple, list)) else (position, position)
+    anchors_x = {"left": 0, "center": (frame_w - w) / 2, "right": frame_w - w}
+    anchors_y = {"top": 0, "center": (frame_h - h) / 2, "bottom": frame_h - h}
+    x = anchors_x[x] if isinstance(x, str) else x
+    y = anchors_y[y] if isinstance(y, str) else y
+    return int(x), int(y)
+
+def with_overlays(clip, overlays):
+    """Clip with the overlays blended into each frame.
+
+    Frames are blended in place, which is safe for decoded and resized
+    frames since those are fresh arrays every time.
+    """
+    def blend_all(frame):
+        for overlay in overlays:
+            frame = overlay.blend(frame)
+        return frame
+    return clip.image_transform(blend_all)
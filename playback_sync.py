@@ -0,0 +1,102 @@
+import threading
+import vlc
+from PyQt6.QtCore import QObject, QTimer, QElapsedTimer, pyqtSignal, pyqtSlot
+
+class PlaybackSync(QObject):
+    """Turns libvlc player events into Qt signals on the GUI thread.
+
+    libvlc calls back on its own threads, so each callback only stores the
+    newest value and posts one queued flush, however many events arrive
+    before the GUI thread gets to it. While playing, a timer at the display
+    refresh rate moves the reported time forward from the last event; while
+    paused nothing runs at all.
+    """
+    time_changed = pyqtSignal(int)      # ms
+    length_changed = pyqtSignal(int)    # ms
+    playing_changed = pyqtSignal(bool)
+
+    _posted = pyqtSignal()
+
+    def __init__(self, player, refresh_rate=60, parent=None):
+        super().__init__(parent)
+        self.player = player
+        self.playing = False
+        self.time = 0
+        self.length = 0
+        self._pending = {}
+        self._flush_posted = False
+        self._lock = threading.Lock()
+        self._since_time = QElapsedTimer()
+
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setInterval(max(1, round(1000 / (refresh_rate or 60))))
+        self.frame_timer.timeout.connect(self.tick)
+
+        self._posted.connect(self.flush)
+        events = player.event_manager()
+        events.event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_time_changed)
+        events.event_attach(vlc.EventType.MediaPlayerLengthChanged, self._on_length_changed)
+        events.event_attach(vlc.EventType.MediaPlayerPlaying, self._on_playing)
+        events.event_attach(vlc.EventType.MediaPlayerPaused, self._on_stopped)
+        events.event_attach(vlc.EventType.MediaPlayerStopped, self._on_stopped)
+        events.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_stopped)
+
+    # --- libvlc threads ---
+    def _post(self, key, value):
+        with self._lock:
+            self._pending[key] = value
+            if self._flush_posted:
+                return
+            self._flush_posted = True
+        self._posted.emit()
+
+    def _on_time_changed(self, event):
+        self._post("time", event.u.new_time)
+
+    def _on_length_changed(self, event):
+        self._post("length", event.u.new_length)
+
+    def _on_playing(self, event):
+        self._post("playing", True)
+
+    def _on_stopped(self, event):
+        self._post("playing", False)
+
+    # --- GUI thread ---
+    @pyqtSlot()
+    def flush(self):
+        with self._lock:
+            self._flush_posted = False
+            pending, self._pending = self._pending, {}
+        if "length" in pending and pending["length"] > 0:
+            self.length = pending["length"]
+            self.length_changed.emit(self.length)
+        if "playing" in pending and pending["playing"] != self.playing:
+            self.playing = pending["playing"]
+            if self.playing:
+                self.frame_timer.start()
+            else:
+                self.frame_timer.stop()
+            self.playing_changed.emit(self.playing)
+        if "time" in pending:
+            self.set_time(pending["time"])
+        elif "playing" in pending and not self.playing:
+            self.set_time(self.player.get_time())
+
+    def set_time(self, t):
+        """Report a new playback time, e.g. right after seeking."""
+        self.time = t
+        self._since_time.start()
+        self.time_changed.emit(t)
+
+    def seek(self, t):
+        self.player.set_time(t)
+        self.set_time(t)
+
+    def tick(self):
+        # libvlc reports time coarsely, fill in the frames between its events
+        if self._since_time.isValid():
+            t = self.time + self._since_time.elapsed()
+            if self.length:
+                t = min(t, self.length)
+            self.time_changed.emit(t)
@@ -0,0 +1,150 @@
+"""Scored preview frames at preview resolution, decoded ahead of the playhead.
+
+One PreviewEngine stays open per video. Its decoder scales to the preview
+size inside ffmpeg, and a background thread decodes, scores and caches the
+frames just after the requested time, so scrubbing mostly hits the cache
+and otherwise costs one seek. Cached frames are wrapped in a QImage that
+shares the frame's memory, so nothing is copied on the way to the screen.
+"""
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage
+from marker_type import MarkerType
+from score_index import ScoreIndex
+from rally_reader import WritableFrameReader, MIN_SEEK_SKIP, SEEK_GAP
+import scoreboard
+
+PREVIEW_SIZE = (800, 450)
+EXPORT_WIDTH = 1920     # the scoreboard is laid out for this width and scaled down
+PREFETCH_AHEAD = 1.0    # seconds decoded past the requested time
+CACHE_FRAMES = 64       # about 1 MB each at the preview size
+
+class PreviewFrame:
+    """A scored frame and the QImage viewing its pixels. Keep this object
+    around for as long as the image is in use."""
+    __slots__ = ("number", "array", "image")
+    def __init__(self, number, array):
+        self.number = number
+        self.array = array
+        h, w = array.shape[:2]
+        self.image = QImage(array.data, w, h, array.strides[0], QImage.Format.Format_RGB888)
+
+class PreviewEngine(QObject):
+    frame_ready = pyqtSignal(int)  # frame number, emitted from the decode thread
+
+    def __init__(self, video_path, size=PREVIEW_SIZE, index=None, cache_frames=CACHE_FRAMES, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.index = index
+        self.cache_frames = cache_frames
+        self.reader = WritableFrameReader(video_path, target_resolution=size)
+        self.size = self.reader.size
+        self.fps = self.reader.fps
+        self.duration = self.reader.duration
+        self.frame_count = max(1, self.reader.n_frames)
+        self.cache = OrderedDict()
+        self.target = 0
+        self.home_name = self.away_name = ""
+        self.points = ScoreIndex()
+        self.overlays = {}     # (home name, away name, score) -> Overlay, decode thread only
+        self.stopped = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # --- GUI thread ---
+    def frame_number(self, t):
+        return min(max(int(t * self.fps + 1e-6), 0), self.frame_count - 1)
+
+    def set_scoring(self, home_name, away_name, marks):
+        """Score frames from (timestamp, MarkerType) markers. Drops the
+        cached frames if the scoreboard changes."""
+        points = ScoreIndex((t, m) for t, m in marks if m in (MarkerType.HOME_PT, MarkerType.AWAY_PT))
+        with self.condition:
+            if (home_name, away_name, list(points)) == (self.home_name, self.away_name, list(self.points)):
+                return
+            self.home_name, self.away_name, self.points = home_name, away_name, points
+            self.cache.clear()
+            self.condition.notify()
+
+    def request(self, t):
+        """The cached frame at time t, or None if it is still being decoded
+        (frame_ready is emitted when it is)."""
+        n = self.frame_number(t)
+        with self.condition:
+            self.target = n
+            frame = self.cache.get(n)
+            if frame is not None:
+                self.cache.move_to_end(n)
+            self.condition.notify()
+        return frame
+
+    def close(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join()
+        self.reader.close()
+
+    # --- decode thread ---
+    def next_missing(self):
+        last = min(self.target + round(PREFETCH_AHEAD * self.fps), self.frame_count - 1)
+        for n in range(self.target, last + 1):
+            if n not in self.cache:
+                return n
+        return None
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.stopped and (n := self.next_missing()) is None:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                home_name, away_name, points = self.home_name, self.away_name, self.points
+            try:
+                array = self.decode(n)
+                array = self.overlay(home_name, away_name, points, n).blend(array)
+            except Exception as e:
+                print(f"Couldn't render preview frame {n}: {e}")
+                with self.condition:
+                    self.condition.wait(1.0)
+                continue
+            with self.condition:
+                if points is not self.points:
+                    continue  # scored with markers that changed meanwhile
+                self.cache[n] = PreviewFrame(n, array)
+                self.cache.move_to_end(n)
+                while len(self.cache) > self.cache_frames:
+                    self.cache.popitem(last=False)
+            self.frame_ready.emit(n)
+
+    def decode(self, n):
+        """Frame n as a fresh writable array, read on from the current
+        position when that is cheaper than seeking."""
+        reader = self.reader
+        t = n / self.fps
+        skip = n - reader.pos
+        if skip < 0 or (skip > 0 and self.should_seek(t)):
+            reader.initialize(t)
+            if reader.pos == n + 1:
+                return reader.last_read
+            skip = max(n - reader.pos, 0)
+        if skip:
+            reader.skip_frames(skip)
+        return reader.read_frame()
+
+    def should_seek(self, t):
+        current_t = self.reader.pos / self.fps
+        if self.index is not None:
+            return self.index.keyframe_before(t) - current_t > MIN_SEEK_SKIP
+        return t - current_t > SEEK_GAP
+
+    def overlay(self, home_name, away_name, points, n):
+        score = points.score_at(n / self.fps * 1000)
+        key = (home_name, away_name, score)
+        if key not in self.overlays:
+            self.overlays[key] = scoreboard.text_scoreboard_overlay(
+                EXPORT_WIDTH, home_name, away_name, *score, scale=self.size[0] / EXPORT_WIDTH)
+        return self.overlays[key]
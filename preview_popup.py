@@ -1,26 +1,68 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel
-from PyQt6.QtGui import QImage, QPixmap
-from PyQt6. QtCore import Qt
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QSlider, QWidget
+from PyQt6.QtGui import QPainter, QColor
+from PyQt6.QtCore import Qt, QRect
+
+class FrameView(QWidget):
+    """Paints a PreviewFrame's image straight from its buffer, fitted to the widget."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.frame = None
+
+    def set_frame(self, frame):
+        self.frame = frame
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(0, 0, 0))
+        if self.frame is None:
+            return
+        image = self.frame.image
+        size = image.size().scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        target = QRect(0, 0, size.width(), size.height())
+        target.moveCenter(self.rect().center())
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawImage(target, image)
 
 class PreviewPopup(QDialog):
-    def __init__(self, composite_clip, t=1.0):
+    def __init__(self, engine, t=0.0):
         super().__init__()
         self.setWindowTitle("Preview")
         self.resize(800,450)
+        self.engine = engine
+        self.t = t
 
-        frame = composite_clip.get_frame(t)
-        h, w, ch = frame.shape
-        bytes_per_line = ch * w
-        qimg = QImage(frame.tobytes(), w, h, bytes_per_line, QImage.Format.Format_RGB888)
-        pixmap = QPixmap.fromImage(qimg)
-
-        label = QLabel()
-        label.setFixedSize(800,450)
-        scaled_pixmap = pixmap.scaled(label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-        label.setPixmap(scaled_pixmap)
-        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.view = FrameView()
+        self.view.setMinimumSize(400, 225)
+        self.slider = QSlider(Qt.Orientation.Horizontal)
+        self.slider.setRange(0, int(engine.duration * 1000))
+        self.slider.setValue(int(t * 1000))
+        self.slider.valueChanged.connect(lambda ms: self.show_time(ms / 1000))
+        self.time_label = QLabel()
+
+        scrub_layout = QHBoxLayout()
+        scrub_layout.addWidget(self.slider, stretch=1)
+        scrub_layout.addWidget(self.time_label)
         layout = QVBoxLayout()
-        layout.addWidget(label)
+        layout.addWidget(self.view, stretch=1)
+        layout.addLayout(scrub_layout)
         self.setLayout(layout)
 
+        engine.frame_ready.connect(self.on_frame_ready)
+        self.show_time(t)
+
+    def show_time(self, t):
+        self.t = t
+        self.time_label.setText(f"{int(t // 60)}:{t % 60:05.2f}")
+        frame = self.engine.request(t)
+        # otherwise keep showing the last frame until this one is decoded
+        if frame is not None:
+            self.view.set_frame(frame)
+
+    def on_frame_ready(self, n):
+        if n == self.engine.frame_number(self.t):
+            self.view.set_frame(self.engine.request(self.t))
 
+    def done(self, result):
+        self.engine.frame_ready.disconnect(self.on_frame_ready)
+        super().done(result)
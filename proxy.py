@@ -0,0 +1,98 @@
+"""Low resolution, short-GOP proxies for marking and previewing.
+
+A proxy is transcoded once in the background and cached next to the
+video as <stem>_proxy.mp4, with <stem>_proxy.json recording which source
+it was made from. Frames keep their timestamps (no frames are dropped or
+duplicated), so times taken on the proxy are valid on the source; exports
+always read the source.
+"""
+import os
+import threading
+import subprocess
+from ffmpeg_utils import FFmpegError, ffmpeg_binary
+import sidecar
+
+PROXY_HEIGHT = 540
+PROXY_GOP = 10       # frames between keyframes, so any seek decodes at most this many
+
+def proxy_path(video_path):
+    return sidecar.sidecar_path(video_path, "proxy.mp4")
+
+def info_path(proxy):
+    return os.path.splitext(proxy)[0] + ".json"
+
+def settings(video_path):
+    """What a proxy is made with, saved alongside its source's stamp."""
+    return {"source": os.path.abspath(video_path), "height": PROXY_HEIGHT, "gop": PROXY_GOP}
+
+def load(video_path):
+    """Path of an up to date proxy for video_path, or None."""
+    path = proxy_path(video_path)
+    info = sidecar.read_json(info_path(path))
+    if not sidecar.is_fresh(info, video_path, **settings(video_path)) or not os.path.exists(path):
+        return None
+    return path
+
+def original_path(path):
+    """The source video if path is a proxy made by this module, else path."""
+    try:
+        source = sidecar.read_json(info_path(path))["source"]
+    except (KeyError, TypeError):
+        return path
+    if os.path.exists(source) and proxy_path(source) == os.path.abspath(path):
+        return source
+    return path
+
+def build(video_path, cancel=None):
+    """Transcode the proxy and return its path.
+
+    Runs ffmpeg at low priority so playback keeps the CPU; setting the
+    cancel event stops it and removes the partial file.
+    """
+    path = proxy_path(video_path)
+    tmp_path = path + ".part.mp4"
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y", "-i", video_path,
+           "-map", "0:v:0", "-map", "0:a:0?",
+           "-vf", f"scale=-2:{PROXY_HEIGHT}", "-fps_mode", "passthrough",
+           "-c:v", "libx264", "-preset", "veryfast", "-crf", "26", "-pix_fmt", "yuv420p",
+           "-g", str(PROXY_GOP), "-keyint_min", str(PROXY_GOP), "-sc_threshold", "0", "-bf", "0",
+           "-c:a", "aac", "-b:a", "96k", "-movflags", "+faststart", tmp_path]
+    info = sidecar.stamp(video_path, **settings(video_path))
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            preexec_fn=(lambda: os.nice(10)) if hasattr(os, "nice") else None)
+    try:
+        while True:
+            try:
+                proc.wait(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    proc.kill()
+                    proc.wait()
+                    raise FFmpegError("cancelled")
+        if proc.returncode != 0:
+            raise FFmpegError(proc.stderr.read().decode(errors="replace").strip() or f"ffmpeg exited with {proc.returncode}")
+        os.replace(tmp_path, path)
+    finally:
+        proc.stderr.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    sidecar.write_json(info_path(path), info)
+    return path
+
+def load_or_build_in_background(video_path, callback):
+    """Pass an up to date proxy's path to callback, building it on a daemon
+    thread first if needed. Returns an event that cancels the build."""
+    cancel = threading.Event()
+    def run():
+        path = load(video_path)
+        if path is None:
+            print(f"Building proxy for {video_path}")
+            try:
+                path = build(video_path, cancel)
+            except (OSError, FFmpegError) as e:
+                print(f"Couldn't build a proxy for {video_path}: {e}")
+                return
+        callback(path)
+    threading.Thread(target=run, daemon=True).start()
+    return cancel
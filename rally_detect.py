@@ -0,0 +1,164 @@
+"""Proposes rallies from the audio track, to start marking from.
+
+The audio is streamed out of ffmpeg as 16 kHz mono and reduced to one
+number per HOP samples as it arrives: the energy of the hop's
+sample-to-sample differences, which is dominated by sharp sounds like the
+ball being hit. Only that is kept (about 1 MB per hour), so memory doesn't
+grow with the length of the video. Decoding is most of the work, so the
+track is split into one time range per core, each decoded by its own ffmpeg.
+
+A hit is a hop whose transient energy jumps by ONSET_DB and stands HIT_DB
+above the recording's median. Hits less than MAX_HIT_GAP apart belong to the
+same rally, and a rally of at least MIN_HITS hits becomes a Serve marker
+just before its first hit and a No point marker just after its last. The
+user then confirms them and decides who won each point.
+"""
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from ffmpeg_utils import FFmpegError, probe, ffmpeg_binary, available_cores
+from marker_type import MarkerType
+
+SAMPLE_RATE = 16000
+HOP = 256               # samples per feature, 16 ms
+CHUNK_SECONDS = 30      # read from ffmpeg at a time
+MIN_RANGE = 300         # seconds, shorter videos aren't split further
+ONSET_DB = 8.0          # rise over the previous two hops
+HIT_DB = 15.0           # above the median transient level
+MIN_HIT_GAP = 0.15      # seconds, later peaks of the same hit are dropped
+MAX_HIT_GAP = 3.0       # seconds without a hit that end a rally
+MIN_HITS = 3
+SERVE_LEAD = 0.5        # seconds before the first hit
+RALLY_TAIL = 1.0        # seconds after the last hit
+
+class AudioFeatures:
+    """Per-hop transient energy in dB, from samples fed in chunks of any size."""
+    def __init__(self, hop=HOP):
+        self.hop = hop
+        self.rest = np.zeros(0, dtype=np.float32)  # samples short of a whole hop
+        self.last = np.float32(0.0)                # sample before rest, for the differences
+        self.transient = []
+
+    def feed(self, samples):
+        samples = np.concatenate((self.rest, np.asarray(samples, dtype=np.float32)))
+        whole = len(samples) // self.hop * self.hop
+        if whole:
+            frames = samples[:whole]
+            diffs = np.diff(frames, prepend=self.last)
+            self.transient.append(to_db(np.mean(diffs.reshape(-1, self.hop) ** 2, axis=1)))
+            self.last = frames[-1]
+        self.rest = samples[whole:]
+
+    def array(self):
+        return np.concatenate(self.transient) if self.transient else np.zeros(0, dtype=np.float32)
+
+def to_db(power):
+    return (10 * np.log10(power + 1e-10)).astype(np.float32)
+
+def find_hits(transient, hop_seconds=HOP / SAMPLE_RATE):
+    """Times in seconds of the hops that look like the ball being hit."""
+    if len(transient) < 3:
+        return np.zeros(0)
+    before = np.minimum(np.roll(transient, 1), np.roll(transient, 2))
+    before[:2] = transient[:2]
+    rise = transient - before
+    hits = np.flatnonzero((rise >= ONSET_DB) & (transient >= np.median(transient) + HIT_DB))
+    if not len(hits):
+        return np.zeros(0)
+    times = hits * hop_seconds
+    kept = [times[0]]
+    for t in times[1:]:
+        if t - kept[-1] >= MIN_HIT_GAP:
+            kept.append(t)
+    return np.array(kept)
+
+def propose_markers(hits):
+    """(ms, MarkerType) Serve / No point pairs around each run of hits."""
+    if not len(hits):
+        return []
+    breaks = np.flatnonzero(np.diff(hits) > MAX_HIT_GAP) + 1
+    markers = []
+    for rally in np.split(hits, breaks):
+        if len(rally) < MIN_HITS:
+            continue
+        markers.append((int(max(rally[0] - SERVE_LEAD, 0) * 1000), MarkerType.SERVE))
+        markers.append((int((rally[-1] + RALLY_TAIL) * 1000), MarkerType.NO_PT))
+    return markers
+
+def read_features(video_path, cancel=None, progress=None, workers=None):
+    """Transient energy per hop of the first audio track. progress(seconds
+    done, duration) is called as chunks are decoded."""
+    duration = probe(video_path)["duration"]
+    workers = max(1, min(workers or available_cores(), int(duration // MIN_RANGE)))
+    # whole hops per range, so the ranges' features line up end to end
+    hops = int(duration * SAMPLE_RATE / HOP / workers)
+    starts = [k * hops * HOP / SAMPLE_RATE for k in range(workers)]
+    done = [0.0]
+    lock = threading.Lock()
+    def report(seconds):
+        with lock:
+            done[0] += seconds
+            if progress:
+                progress(done[0], duration)
+    def read_range(k):
+        last = k == workers - 1
+        transient = stream_features(video_path, starts[k], None if last else hops * HOP / SAMPLE_RATE, cancel, report).array()
+        if not last:
+            # ffmpeg can be a few samples off
+            transient = np.pad(transient[:hops], (0, max(hops - len(transient), 0)), mode="edge")
+        return transient
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return np.concatenate(list(pool.map(read_range, range(workers))))
+
+def stream_features(video_path, start, length, cancel, report):
+    """AudioFeatures of the audio from start for length seconds (None: to the end)."""
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-ss", str(start), "-i", video_path]
+    if length is not None:
+        cmd += ["-t", str(length)]
+    cmd += ["-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"]
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    features = AudioFeatures()
+    try:
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise FFmpegError("cancelled")
+            chunk = proc.stdout.read(CHUNK_SECONDS * SAMPLE_RATE * 2)
+            if len(chunk) < 2:
+                break
+            samples = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2)
+            features.feed(samples / np.float32(32768))
+            report(len(samples) / SAMPLE_RATE)
+        proc.wait()
+        if proc.returncode != 0:
+            raise FFmpegError(proc.stderr.read().decode(errors="replace").strip() or f"ffmpeg exited with {proc.returncode}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+    return features
+
+def detect(video_path, cancel=None, progress=None):
+    """Proposed (ms, MarkerType) markers for the video, in time order."""
+    return propose_markers(find_hits(read_features(video_path, cancel, progress)))
+
+def detect_in_background(video_path, callback, failed=None):
+    """Run detect on a daemon thread and pass the markers to callback, or
+    the error to failed(message) if it doesn't finish. Returns an event that
+    cancels it; a cancelled run calls neither."""
+    cancel = threading.Event()
+    def run():
+        try:
+            markers = detect(video_path, cancel)
+        except Exception as e:
+            if cancel.is_set():
+                return
+            print(f"Couldn't detect rallies in {video_path}: {e}")
+            if failed:
+                failed(f"{type(e).__name__}: {e}")
+            return
+        callback(markers)
+    threading.Thread(target=run, daemon=True).start()
+    return cancel
@@ -0,0 +1,138 @@
+"""Front-to-back frame reader for rally exports.
+
+Concatenating subclips of one VideoFileClip makes the ffmpeg reader restart
+at every rally boundary. RallyReader instead maps the output timeline onto the
+source and walks the source once, in order: short gaps between rallies are
+read through and long gaps are skipped with a forward seek, so decode time
+follows the total rally length rather than the number of rallies.
+"""
+from bisect import bisect_right
+import numpy as np
+from moviepy import VideoClip
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+
+# Without a seek index, gaps longer than this (seconds) are seeked over
+SEEK_GAP = 3.0
+# With one, seek when it lands at least this far (seconds) past the current frame
+MIN_SEEK_SKIP = 1.0
+
+class WritableFrameReader(FFMPEG_VideoReader):
+    """FFMPEG_VideoReader that reads each frame into its own writable buffer,
+    so overlays can be blended in place without copying the frame."""
+    def read_frame(self):
+        w, h = self.size
+        buf = bytearray(self.depth * w * h)
+        view = memoryview(buf)
+        filled = 0
+        while filled < len(buf):
+            n = self.proc.stdout.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        if filled < len(buf):
+            if not hasattr(self, "last_decoded"):
+                raise IOError(f"Failed to read the first frame of {self.filename}")
+            # past the end of the file: keep handing out the last good frame,
+            # as decoded, since callers blend into the frames they get
+            result = self.last_decoded.copy()
+        else:
+            result = np.frombuffer(buf, dtype=np.uint8).reshape(h, w, self.depth)
+            if not hasattr(self, "last_decoded"):
+                self.last_decoded = np.empty_like(result)
+            np.copyto(self.last_decoded, result)
+        self.last_read = result
+        self.pos += 1
+        return result
+
+class RallyTimeline:
+    """Output timeline of rallies played back to back."""
+    def __init__(self, clip_ranges):
+        self.ranges = [(start, end) for start, end, *_ in clip_ranges]
+        self.offsets = []
+        self.duration = 0
+        for start, end in self.ranges:
+            self.offsets.append(self.duration)
+            self.duration += end - start
+
+    def locate(self, t):
+        """(rally index, source time) for time t of the output."""
+        i = max(0, bisect_right(self.offsets, t) - 1)
+        start, end = self.ranges[i]
+        return i, min(start + t - self.offsets[i], end)
+
+class RallyReader(RallyTimeline):
+    def __init__(self, video_path, clip_ranges, size=None, seek_gap=SEEK_GAP, index=None):
+        super().__init__(clip_ranges)
+        self.reader = WritableFrameReader(video_path, target_resolution=size)
+        self.index = index
+        self.size = self.reader.size
+        self.fps = self.reader.fps
+        self.seek_gap = seek_gap
+        self.seeks = 0
+        self.handed_out = None
+
+    def frame_number(self, source_t):
+        return self.reader.get_frame_number(source_t)
+
+    def get_frame(self, source_t):
+        """Decoded frame at source_t, never one that was handed out before
+        (it may already have an overlay blended into it)."""
+        reader = self.reader
+        # + 1 so it matches reader.pos after the frame has been read
+        pos = reader.get_frame_number(source_t) + 1
+        if pos == reader.pos and pos != self.handed_out:
+            frame = reader.last_read
+        elif pos <= reader.pos or self.should_seek(source_t):
+            self.seeks += 1
+            reader.initialize(source_t)
+            frame = reader.last_read
+        else:
+            reader.skip_frames(pos - reader.pos - 1)
+            frame = reader.read_frame()
+        self.handed_out = reader.pos
+        return frame
+
+    def should_seek(self, source_t):
+        current_t = self.reader.pos / self.fps
+        if self.index is not None:
+            # a seek decodes from the keyframe before source_t, reading on decodes from here
+            return self.index.keyframe_before(source_t) - current_t > MIN_SEEK_SKIP
+        return source_t - current_t > self.seek_gap
+
+    def close(self):
+        self.reader.close()
+
+def rally_clip(reader, overlays=None, metrics=None):
+    """VideoClip of all rallies back to back.
+
+    overlays[i], if given, is blended into every frame of rally i. metrics
+    (an ExportMetrics) gets the decode and composite time and frame counts.
+    """
+    last = {"key": None, "frame": None}
+    def frame_function(t):
+        i, source_t = reader.locate(t)
+        if metrics:
+            metrics.rally(i)
+        key = (i, reader.frame_number(source_t))
+        # output fps above the source fps repeats frames, reuse the finished one
+        if key == last["key"]:
+            if metrics:
+                metrics.count("frames_repeated")
+            return last["frame"]
+        if metrics is None:
+            frame = reader.get_frame(source_t)
+            if overlays:
+                frame = overlays[i].blend(frame)
+        else:
+            with metrics.stage("decode"):
+                frame = reader.get_frame(source_t)
+            metrics.count("frames_decoded")
+            metrics.count("decoded_bytes", frame.nbytes)
+            if overlays:
+                with metrics.stage("composite"):
+                    frame = overlays[i].blend(frame)
+        last["key"], last["frame"] = key, frame
+        return frame
+    clip = VideoClip(frame_function, duration=reader.duration)
+    clip.fps = reader.fps
+    return clip
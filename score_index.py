@@ -0,0 +1,184 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+from marker_type import MarkerType
+
+BLOCK_SIZE = 256    # markers per block, a block is split when it doubles
+
+class Fenwick:
+    """Prefix sums over a list of counts with O(log n) updates."""
+    def __init__(self, counts=()):
+        self.tree = [0] + list(counts)
+        for i in range(1, len(self.tree)):
+            parent = i + (i & -i)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[i]
+
+    def add(self, i, delta):
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Sum of the first i counts."""
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, total):
+        """(i, rest): the count that the first total + 1 units end in, and how
+        many of those units come before it."""
+        i = 0
+        step = 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            if i + step < len(self.tree) and self.tree[i + step] <= total:
+                i += step
+                total -= self.tree[i]
+            step >>= 1
+        return i, total
+
+class ScoreIndex:
+    """Markers sorted by timestamp with running home/away point totals.
+
+    The markers are kept in sorted blocks of up to 2 * BLOCK_SIZE, with
+    Fenwick trees over the blocks' sizes and point counts. Adding or removing
+    a marker only touches its own block and O(log n) tree nodes, wherever it
+    is in the match, and "score at time t" is a binary search plus a prefix
+    sum over the blocks before it.
+    """
+    def __init__(self, marks=()):
+        # (timestamp, MarkerType) in the same order as Marker.__lt__, since
+        # MarkerType members compare as their str values
+        keys = sorted((int(timestamp), marker_type) for timestamp, marker_type in marks)
+        self._blocks = [keys[i:i+BLOCK_SIZE] for i in range(0, len(keys), BLOCK_SIZE)]
+        self._len = len(keys)
+        self._rebuild()
+
+    def _rebuild(self):
+        """Block maxes and trees, after blocks were split or dropped."""
+        self._maxes = [block[-1] for block in self._blocks]
+        self._sizes = Fenwick(len(block) for block in self._blocks)
+        self._home = Fenwick(count(block, MarkerType.HOME_PT) for block in self._blocks)
+        self._away = Fenwick(count(block, MarkerType.AWAY_PT) for block in self._blocks)
+
+    def __len__(self):
+        return self._len
+
+    def _locate(self, i):
+        """(block, position in it) of the marker at position i."""
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("marker index out of range")
+        return self._sizes.find(i)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._len)
+            if step != 1:
+                return list(self)[i]
+            return self._range(start, stop)
+        b, j = self._locate(i)
+        return self._blocks[b][j]
+
+    def _range(self, start, stop):
+        """Markers start..stop as a list, read block by block."""
+        markers = []
+        if start >= stop:
+            return markers
+        b, j = self._sizes.find(start)
+        while len(markers) < stop - start:
+            markers += self._blocks[b][j:j + stop - start - len(markers)]
+            b, j = b + 1, 0
+        return markers
+
+    def __iter__(self):
+        return chain.from_iterable(self._blocks)
+
+    def insert_position(self, timestamp, marker_type):
+        """Position add() would put this marker at."""
+        key = (int(timestamp), marker_type)
+        b = min(bisect_right(self._maxes, key), len(self._blocks) - 1)
+        if b < 0:
+            return 0
+        return self._sizes.prefix(b) + bisect_right(self._blocks[b], key)
+
+    def add(self, timestamp, marker_type):
+        """Insert a marker and return its position in time order."""
+        key = (int(timestamp), marker_type)
+        i = self.insert_position(timestamp, marker_type)
+        self._len += 1
+        if not self._blocks:
+            self._blocks.append([key])
+            self._rebuild()
+            return i
+        b = min(bisect_right(self._maxes, key), len(self._blocks) - 1)
+        block = self._blocks[b]
+        insort(block, key)
+        if len(block) > 2 * BLOCK_SIZE:
+            self._blocks[b:b+1] = [block[:BLOCK_SIZE], block[BLOCK_SIZE:]]
+            self._rebuild()
+        else:
+            self._maxes[b] = block[-1]
+            self._update(b, key, 1)
+        return i
+
+    def _update(self, b, key, delta):
+        self._sizes.add(b, delta)
+        if key[1] == MarkerType.HOME_PT:
+            self._home.add(b, delta)
+        elif key[1] == MarkerType.AWAY_PT:
+            self._away.add(b, delta)
+
+    def remove(self, timestamp, marker_type):
+        """Remove one matching marker and return the position it had."""
+        i = self.index(timestamp, marker_type)
+        self.pop(i)
+        return i
+
+    def pop(self, i):
+        """Remove and return the marker at position i."""
+        b, j = self._locate(i)
+        block = self._blocks[b]
+        marker = block.pop(j)
+        self._len -= 1
+        if block:
+            self._maxes[b] = block[-1]
+            self._update(b, marker, -1)
+        else:
+            del self._blocks[b]
+            self._rebuild()
+        return marker
+
+    def index(self, timestamp, marker_type):
+        """Position of a marker in time order."""
+        key = (int(timestamp), marker_type)
+        b = bisect_left(self._maxes, key)
+        if b < len(self._blocks):
+            j = bisect_left(self._blocks[b], key)
+            if self._blocks[b][j] == key:
+                return self._sizes.prefix(b) + j
+        raise ValueError(f"No {marker_type.value} marker at {timestamp}")
+
+    def _score(self, b, j):
+        """(home, away) points before the j-th marker of block b."""
+        before = self._blocks[b][:j] if b < len(self._blocks) else ()
+        return (self._home.prefix(b) + count(before, MarkerType.HOME_PT),
+                self._away.prefix(b) + count(before, MarkerType.AWAY_PT))
+
+    def score_before(self, i):
+        """(home, away) points among the first i markers in time order."""
+        if i >= self._len:
+            return self._score(len(self._blocks), 0)
+        return self._score(*self._locate(i))
+
+    def score_at(self, t):
+        """(home, away) points marked strictly before time t (ms)."""
+        b = bisect_left(self._maxes, (t,))
+        j = bisect_left(self._blocks[b], (t,)) if b < len(self._blocks) else 0
+        return self._score(b, j)
+
+def count(keys, marker_type):
+    return sum(1 for _, m in keys if m == marker_type)
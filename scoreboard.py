@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+from moviepy import TextClip, CompositeVideoClip, ImageClip, ColorClip
+from overlay import Overlay, with_overlays
+
+FONT="fonts/eras-itc-bold.ttf"
+# The text scoreboard is laid out for a frame this wide and scaled to others
+LAYOUT_WIDTH = 1920
+
+def make_scoreboard_composite(video_clip, scoreboard_type, home_name, away_name, scoreboard_path, position=("center", 20), home=0, away=0):
+    w, h = video_clip.size
+    if scoreboard_type=="text":
+        scoreboard = text_scoreboard_overlay(w, home_name, away_name, home, away)
+    else:
+        scoreboard = Overlay.from_clip(ImageClip(scoreboard_path).resized(height=h/8), (w, h), position)
+    return with_overlays(video_clip, [scoreboard])
+
+class ScoreboardCache:
+    """LRU of rasterized text scoreboards.
+
+    Each distinct (home name, away name, score, width, font) overlay is
+    rendered once into an RGBA image and shared by every rally and preview
+    that shows it. Least recently used images are dropped once the cache
+    holds more than max_bytes.
+    """
+    def __init__(self, max_bytes=64*1024*1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, home_name, away_name, score, width, font=None):
+        font = font or FONT
+        key = (home_name, away_name, score, width, font)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+        image = render_text_scoreboard(home_name, away_name, score, width, font)
+        image.setflags(write=False)
+        with self._lock:
+            self.misses += 1
+            if key not in self._images:
+                self._images[key] = image
+                self.nbytes += image.nbytes
+            # always keep the newest image, even if it is bigger than the budget
+            while self.nbytes > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.nbytes = 0
+
+SCOREBOARD_CACHE = ScoreboardCache()
+
+def create_text_scoreboard(width, duration, home_name, away_name, home, away):
+    print(f'duration: {duration} score: {home}:{away}')
+    image = SCOREBOARD_CACHE.get(home_name, away_name, f"{home}:{away}", width)
+    return [ImageClip(image, duration=duration).with_position((0, 0))]
+
+def text_scoreboard_overlay(width, home_name, away_name, home, away, scale=1.0):
+    """Scoreboard overlay for a frame of the given width, then resized by
+    scale (e.g. to show an export's scoreboard on a preview).
+
+    The text boxes have a fixed size, so it is always laid out at
+    LAYOUT_WIDTH and scaled to the frame, which keeps the same proportions
+    at every export size.
+    """
+    scale *= width / LAYOUT_WIDTH
+    image = SCOREBOARD_CACHE.get(home_name, away_name, f"{home}:{away}", LAYOUT_WIDTH)
+    if scale != 1.0:
+        h, w = image.shape[:2]
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        image = np.asarray(Image.fromarray(image).resize(size, Image.Resampling.LANCZOS))
+    return Overlay(image)
+
+def render_text_scoreboard(home_name, away_name, score, width, font=None):
+    """Rasterize the text scoreboard into a single (height, width, 4) RGBA image."""
+    layers = text_scoreboard_layers(width, 1, home_name, away_name, score, font or FONT)
+    height = max(int(layer.pos(0)[1]) + layer.size[1] for layer in layers)
+    overlay = CompositeVideoClip(layers, size=(width, height))
+    rgb = overlay.get_frame(0)[:, :, :3]
+    alpha = np.round(overlay.mask.get_frame(0) * 255)
+    return np.dstack([rgb, alpha]).astype(np.uint8)
+
+def text_scoreboard_layers(width, duration, home_name, away_name, score, font=FONT):
+    # Create text overlay
+    # Define common parameters
+    font_size = 60
+    color = 'white'
+    # Individual text clips
+    team1_clip = TextClip(text=home_name, font=font, font_size=font_size, color=color, duration=duration, method="caption", size=(600, font_size+20), horizontal_align="right")
+    team2_clip = TextClip(text=away_name, font=font, font_size=font_size, color=color, duration=duration, method="caption", size=(600, font_size+20), horizontal_align="left")
+    score_clip = TextClip(text=score, font=font, font_size=font_size, color=color, duration=duration, method="caption", size=(600, font_size+20), text_align="center")
+
+    # Create background color
+    bar_height = 60
+    bar = ColorClip(size=(width, bar_height), color=(0, 0, 0), duration=duration).with_opacity(0.5)
+
+
+    # Get widths to align around center
+    w_team1, h = team1_clip.size
+    w_score, _ = score_clip.size
+    w_team2, _ = team2_clip.size
+
+    # Horizontal spacing (adjust as needed)
+    gap = 30
+
+    # Position so that the score (with colon) is centered horizontally
+    team1_x = width/2 - (w_score/2 + gap + w_team1)
+    score_x = width/2 - w_score/2
+    team2_x = width/2 + (w_score/2 + gap)
+    # Vertically near the top
+    y_pos = 0
+
+    # Create positioned clips
+    team1_clip = team1_clip.with_position((team1_x, y_pos))
+    score_clip = score_clip.with_position((score_x, y_pos))
+    team2_clip = team2_clip.with_position((team2_x, y_pos))
+    bar = bar.with_position((0, y_pos+20))
+    return [bar, team1_clip, team2_clip, score_clip]
@@ -0,0 +1,112 @@
+"""Keyframe and packet timestamp index for a source video.
+
+Built once with a stream-copy pass over the video track (no decoding) and
+cached next to the markers as <stem>_index.json. The cache is keyed on the
+file's size and mtime, so editing or replacing the video rebuilds it.
+"""
+import threading
+from bisect import bisect_right
+from ffmpeg_utils import run_ffmpeg, probe
+import sidecar
+
+# Bumped when indexes built by older versions are wrong and have to be rebuilt
+INDEX_VERSION = 2
+
+class SeekIndex:
+    def __init__(self, keyframes, frames, size=None, mtime=None, version=INDEX_VERSION):
+        self.keyframes = keyframes  # keyframe times in seconds, sorted
+        self.frames = frames        # every video packet's time in seconds, sorted
+        self.size = size
+        self.mtime = mtime
+        self.version = version
+
+    def keyframe_before(self, t):
+        """Latest keyframe at or before t (the first one if t is before it)."""
+        i = bisect_right(self.keyframes, t + 1e-6) - 1
+        return self.keyframes[max(i, 0)] if self.keyframes else 0.0
+
+    def frame_before(self, t):
+        """Timestamp of the frame displayed at time t."""
+        i = bisect_right(self.frames, t + 1e-6) - 1
+        return self.frames[max(i, 0)] if self.frames else t
+
+    def matches(self, video_path):
+        return sidecar.is_fresh({"size": self.size, "mtime": self.mtime, "version": self.version}, video_path,
+                                version=INDEX_VERSION)
+
+    def to_json(self):
+        return {"version": self.version, "size": self.size, "mtime": self.mtime,
+                "keyframes": [round(t, 6) for t in self.keyframes],
+                "frames": [round(t, 6) for t in self.frames]}
+
+def index_path(video_path):
+    return sidecar.sidecar_path(video_path, "index.json")
+
+def build(video_path):
+    """Scan the video packets with ffmpeg's framecrc muxer.
+
+    framecrc lists every packet's pts and only prints flags (F=) for packets
+    that aren't plain keyframes. -copyts keeps the container's timestamps, so
+    its start time is subtracted exactly once to get times from 0 like the
+    players and moviepy use.
+    """
+    source = sidecar.stamp(video_path)
+    start = probe(video_path).get("start") or 0.0
+    proc = run_ffmpeg(["-i", video_path, "-map", "0:v:0", "-c", "copy", "-copyts", "-f", "framecrc", "-"])
+    timebase = 1.0
+    keyframes = []
+    frames = []
+    for line in proc.stdout.decode(errors="replace").splitlines():
+        if line.startswith("#tb 0:"):
+            num, den = line.split(":", 1)[1].strip().split("/")
+            timebase = int(num) / int(den)
+            continue
+        if line.startswith("#") or not line.strip():
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        pts = int(fields[2])
+        if pts < -2**62:  # AV_NOPTS_VALUE
+            continue
+        t = pts * timebase - start
+        frames.append(t)
+        flags = next((field for field in fields[6:] if field.startswith("F=")), None)
+        if flags is None or int(flags[2:], 16) & 1:
+            keyframes.append(t)
+    frames.sort()
+    keyframes.sort()
+    return SeekIndex(keyframes, frames, source["size"], source["mtime"])
+
+def save(index, path):
+    sidecar.write_json(path, index.to_json())
+
+def load(video_path):
+    """Cached index for video_path, or None if it is missing or stale."""
+    loaded = sidecar.read_json(index_path(video_path))
+    if loaded is None:
+        return None
+    index = SeekIndex(loaded["keyframes"], loaded["frames"], loaded["size"], loaded["mtime"], loaded.get("version"))
+    return index if index.matches(video_path) else None
+
+def load_or_build(video_path):
+    index = load(video_path)
+    if index is None:
+        print(f"Building seek index for {video_path}")
+        index = build(video_path)
+        try:
+            save(index, index_path(video_path))
+        except OSError as e:
+            print(f"Couldn't save seek index: {e}")
+    return index
+
+def load_or_build_in_background(video_path, callback):
+    """Run load_or_build on a daemon thread and pass the index to callback."""
+    def run():
+        try:
+            index = load_or_build(video_path)
+        except Exception as e:
+            print(f"Couldn't index {video_path}: {e}")
+            return
+        callback(index)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,43 @@
+"""Files kept next to a video: its caches, autosave and upload session.
+
+Each is named <stem>_<suffix> after the video. The ones derived from the
+video record its size and mtime (and the settings they were made with) as
+a stamp; a sidecar whose stamp doesn't match the video as it is now, or
+whose video can't be read, is stale and gets made again.
+"""
+import os
+import json
+
+def sidecar_path(video_path, suffix):
+    dirname = os.path.dirname(video_path)
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(dirname, f"{stem}_{suffix}")
+
+def stamp(video_path, **settings):
+    """The video's size and mtime plus settings, to save with a sidecar.
+    Raises OSError if the video can't be read."""
+    stat = os.stat(video_path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime, **settings}
+
+def is_fresh(saved, video_path, **settings):
+    """Whether saved (a dict, e.g. a loaded sidecar) has the video's current stamp."""
+    try:
+        current = stamp(video_path, **settings)
+    except OSError:
+        return False
+    return isinstance(saved, dict) and all(saved.get(key) == value for key, value in current.items())
+
+def read_json(path):
+    """The JSON in path, or None if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_json(path, data):
+    """Replace path with data in one step, so readers never see half of it."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
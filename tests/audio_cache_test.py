@@ -0,0 +1,20 @@
+import wave
+import numpy as np
+from audio_cache import write_rallies, AUDIO_RATE, CHANNELS
+
+def test_write_rallies_cuts_sample_ranges_without_drift(tmp_path):
+    # every sample holds its own index (mod 2**15), so the wav shows where it was cut from
+    pcm = np.repeat((np.arange(10 * AUDIO_RATE) % 32768).astype(np.int16)[:, None], CHANNELS, axis=1)
+    clip_ranges = [(1.00001, 2.00001, "a")] * 300 + [(9.5, 10.5, "past the end")]
+    wav_path = str(tmp_path / "rallies.wav")
+    duration = write_rallies(pcm, clip_ranges, wav_path)
+    with wave.open(wav_path, "rb") as wav:
+        assert wav.getnchannels() == CHANNELS
+        assert wav.getframerate() == AUDIO_RATE
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16).reshape(-1, CHANNELS)
+    assert len(samples) == round(duration * AUDIO_RATE)
+    assert samples[0, 0] == AUDIO_RATE % 32768
+    # the last rally starts where the output timeline says, not 300 roundings later
+    last = round(300 * 1.0 * AUDIO_RATE)
+    assert samples[last, 0] == round(9.5 * AUDIO_RATE) % 32768
+    assert not samples[last + AUDIO_RATE // 2:].any()
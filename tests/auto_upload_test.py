@@ -0,0 +1,165 @@
+import os
+import json
+import re
+import time
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+import requests
+import auto_upload
+from auto_upload import upload_video, session_path
+from upload_queue import UploadQueue
+
+KB = 1024
+
+class FakeUploadServer(ThreadingHTTPServer):
+    """Just enough of YouTube's resumable upload protocol."""
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), UploadHandler)
+        self.sessions = {}      # id -> bytearray received so far
+        self.failures = []      # (status, bytes of the chunk to keep) for the next PUTs
+        self.chunks = []        # (session id, start, length) of each chunk received
+        self.titles = []        # of each session started
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/upload"
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class UploadHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, headers=(), body=b""):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.titles.append(body["snippet"]["title"])
+        session_id = str(len(self.server.sessions) + 1)
+        self.server.sessions[session_id] = bytearray()
+        self.reply(200, [("Location", f"http://127.0.0.1:{self.server.server_port}/session/{session_id}")])
+
+    def do_PUT(self):
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        session_id = self.path.rsplit("/", 1)[1]
+        if session_id not in self.server.sessions:
+            return self.reply(404)
+        received = self.server.sessions[session_id]
+        match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", self.headers["Content-Range"])
+        size = int(self.headers["Content-Range"].rsplit("/", 1)[1])
+        if match:
+            assert int(match[1]) == len(received)
+            if self.server.failures:
+                status, keep = self.server.failures.pop(0)
+                received += data[:keep]
+                return self.reply(status)
+            self.server.chunks.append((session_id, len(received), len(data)))
+            received += data
+        if len(received) == size:
+            return self.reply(201, [("Content-Type", "application/json")], b'{"id": "video123"}')
+        self.reply(308, [("Range", f"bytes=0-{len(received) - 1}")] if received else [])
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(auto_upload, "BACKOFF_BASE", 0.0)
+    server = FakeUploadServer()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "oct18-home-away.mp4"
+    path.write_bytes(os.urandom(1000 * KB))
+    return str(path)
+
+def upload(server, video, **kwargs):
+    return upload_video(video, chunk_size=256 * KB, session=requests.Session(), upload_url=server.url, **kwargs)
+
+def test_uploads_in_chunks_with_progress(server, video):
+    progress = []
+    response = upload(server, video, progress=lambda sent, total: progress.append((sent, total)))
+    assert response == {"id": "video123"}
+    assert progress == [(0, 1000 * KB), (256 * KB, 1000 * KB), (512 * KB, 1000 * KB),
+                        (768 * KB, 1000 * KB), (1000 * KB, 1000 * KB)]
+    with open(video, "rb") as f:
+        assert server.sessions["1"] == f.read()
+    assert not os.path.exists(session_path(video))
+
+def test_title_is_given_or_the_file_name(server, video, tmp_path):
+    upload(server, video, title="[oct18] Home vs Away/B Set 2")
+    # names with suffixes or extra dashes in them are fine
+    other = tmp_path / "oct18-home-away-b_highlights.mp4"
+    other.write_bytes(os.urandom(10 * KB))
+    upload(server, str(other))
+    assert server.titles == ["[oct18] Home vs Away/B Set 2", "oct18-home-away-b_highlights"]
+
+def test_retries_and_resends_only_what_was_lost(server, video):
+    # the first chunk fails after 100 KB of it arrived
+    server.failures = [(503, 100 * KB)]
+    response = upload(server, video)
+    assert response == {"id": "video123"}
+    with open(video, "rb") as f:
+        assert server.sessions["1"] == f.read()
+    assert [start for _, start, _ in server.chunks] == [100 * KB, 356 * KB, 612 * KB, 868 * KB]
+
+def test_resumes_saved_session_after_interruption(server, video):
+    class Interrupted(Exception):
+        pass
+
+    def stop_halfway(sent, total):
+        if sent >= 512 * KB:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        upload(server, video, progress=stop_halfway)
+    assert os.path.exists(session_path(video))
+
+    response = upload(server, video)
+    assert response == {"id": "video123"}
+    assert list(server.sessions) == ["1"]
+    assert [start for _, start, _ in server.chunks] == [0, 256 * KB, 512 * KB, 768 * KB]
+    with open(video, "rb") as f:
+        assert server.sessions["1"] == f.read()
+
+def test_starts_over_when_saved_session_expired(server, video):
+    auto_upload.save_session(video, f"http://127.0.0.1:{server.server_port}/session/gone")
+    assert upload(server, video) == {"id": "video123"}
+    assert list(server.sessions) == ["1"]
+
+def test_queue_resumes_uploads_saved_on_disk(server, video, tmp_path, monkeypatch):
+    failed = str(tmp_path / "failed.mp4")
+    with open(failed, "wb") as f:
+        f.write(os.urandom(KB))
+    monkeypatch.setattr(auto_upload, "upload_video", partial(upload_video, chunk_size=256 * KB, upload_url=server.url))
+    state_path = str(tmp_path / "upload_queue.json")
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump([{"path": video, "state": "uploading"}, {"path": str(tmp_path / "deleted.mp4"), "state": "queued"},
+                   {"path": failed, "state": "failed", "error": "UploadError: HTTP 403"}], f)
+
+    uploads = UploadQueue(state_path)
+    assert [task.path for task in uploads.pending()] == [video]
+    uploads.session = requests.Session()
+    uploads.resume()
+    deadline = time.monotonic() + 10
+    while uploads.pending() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    uploads.close()
+    assert uploads.tasks[0].state == "done"
+    assert uploads.tasks[0].video_id == "video123"
+    # the failed upload isn't tried again until it's submitted again
+    assert list(server.sessions) == ["1"]
+    with open(state_path, encoding="utf-8") as f:
+        assert [(entry["path"], entry["state"], entry["error"]) for entry in json.load(f)] == \
+            [(failed, "failed", "UploadError: HTTP 403")]
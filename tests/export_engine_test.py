@@ -0,0 +1,98 @@
+import os
+import json
+import pytest
+from marker_type import MarkerType
+from export_engine import ExportJob, export_match, build_clip_ranges, load_marks, SegmentationError
+from ffmpeg_utils import run_ffmpeg, probe
+from output_specs import parse_specs
+
+MARKS = [
+    (1000, MarkerType.HOME_PT),
+    (2000, MarkerType.SERVE),
+    (5000, MarkerType.HOME_PT),
+    (8000, MarkerType.SERVE),
+    (11500, MarkerType.AWAY_PT),
+    (15000, MarkerType.SERVE),
+    (17000, MarkerType.NO_PT),
+]
+
+def test_build_clip_ranges():
+    """Rallies run from each serve to the next marker, points before the first serve count."""
+    clip_ranges, scores = build_clip_ranges(list(reversed(MARKS)))
+    assert clip_ranges == [
+        (2.0, 5.0, MarkerType.HOME_PT),
+        (8.0, 11.5, MarkerType.AWAY_PT),
+        (15.0, 17.0, MarkerType.NO_PT),
+    ]
+    assert scores == [(1, 0), (2, 0), (2, 1)]
+
+def test_point_without_serve():
+    with pytest.raises(SegmentationError):
+        build_clip_ranges(MARKS + [(18000, MarkerType.HOME_PT)])
+
+def test_load_marks(tmp_path):
+    marks_path = tmp_path / "match_marks.json"
+    marks_path.write_text(json.dumps({"file": "match.mp4", "marks": [{"time": 2000, "label": "Serve"}]}))
+    assert load_marks(marks_path) == [(2000, MarkerType.SERVE)]
+
+@pytest.fixture
+def font(monkeypatch):
+    import scoreboard
+    for path in (scoreboard.FONT, "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+                 "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"):
+        if os.path.exists(path):
+            monkeypatch.setattr(scoreboard, "FONT", path)
+            return path
+    pytest.skip("no font to render the scoreboard with")
+
+@pytest.fixture
+def small_video(tmp_path):
+    path = str(tmp_path / "small.mp4")
+    run_ffmpeg(["-f", "lavfi", "-i", "testsrc2=size=640x360:rate=30:duration=4", "-c:v", "libx264",
+                "-preset", "ultrafast", "-pix_fmt", "yuv420p", path])
+    return path
+
+@pytest.mark.parametrize("outputs", [None, "match,highlights:1"])
+def test_scored_export_narrower_than_the_scoreboard_layout(font, small_video, tmp_path, outputs):
+    marks = [(200, MarkerType.SERVE), (1500, MarkerType.HOME_PT), (2000, MarkerType.SERVE), (3800, MarkerType.AWAY_PT)]
+    job = ExportJob(small_video, marks=marks, output_path=str(tmp_path / "out.mp4"), profile="draft", audio=False,
+                    logger=None, outputs=parse_specs(outputs))
+    result = export_match(job)
+    assert result["status"] == "done", result["error"]
+    assert probe(job.output_path)["video_size"] == [640, 360]
+
+def test_failed_export_only_removes_its_own_files(small_video, tmp_path, monkeypatch):
+    import export_engine
+    output_path = str(tmp_path / "out.mp4")
+    # a set from an earlier export of a longer match, this one has a single set
+    (tmp_path / "out_set2.mp4").write_bytes(b"earlier")
+    def render(job, clip_ranges, scores, outputs=None):
+        for output in outputs:
+            open(output.path, "wb").close()
+        raise RuntimeError("encoder died")
+    monkeypatch.setattr(export_engine, "render", render)
+    marks = [(200, MarkerType.SERVE), (1500, MarkerType.HOME_PT)]
+    result = export_match(ExportJob(small_video, marks=marks, output_path=output_path, logger=None,
+                                    outputs=parse_specs("match,sets")))
+    assert result["status"] == "failed"
+    assert sorted(os.listdir(tmp_path)) == ["out_set2.mp4", "small.mp4"]
+
+def busy_segment():
+    import resource, time
+    from export_engine import memory_watch
+    with memory_watch():
+        for _ in range(100):
+            time.sleep(0.02)
+    return resource.getrlimit(resource.RLIMIT_AS)
+
+@pytest.mark.skipif(os.name != "posix", reason="memory limits are POSIX only")
+def test_worker_memory_limit_stops_only_the_worker():
+    import resource
+    from concurrent.futures import ProcessPoolExecutor
+    from export_engine import limit_worker_memory, WorkerMemoryError
+    with ProcessPoolExecutor(max_workers=1, initializer=limit_worker_memory, initargs=(1,)) as pool:
+        with pytest.raises(WorkerMemoryError):
+            pool.submit(busy_segment).result(timeout=30)
+    # the ffmpeg a worker starts inherits its limits, so they are left as they are
+    with ProcessPoolExecutor(max_workers=1, initializer=limit_worker_memory, initargs=(10**6,)) as pool:
+        assert pool.submit(busy_segment).result(timeout=30) == resource.getrlimit(resource.RLIMIT_AS)
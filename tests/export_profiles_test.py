@@ -0,0 +1,23 @@
+from export_profiles import PROFILES, fit_fps, resolve
+
+def test_keeps_native_size_and_frame_rate_when_they_fit():
+    settings = resolve("upload", None, 8, infos={"video_size": [1920, 1080], "video_fps": 59.94})
+    assert settings.size == (1920, 1080)
+    assert not settings.resize
+    assert settings.fps == 59.94
+    assert settings.threads == 8
+
+def test_fits_size_to_the_source_aspect_ratio():
+    # draft never enlarges, upload fills 1080p without stretching
+    assert resolve("draft", None, 1, infos={"video_size": [640, 480], "video_fps": 30}).size == (640, 480)
+    assert resolve("draft", None, 1, infos={"video_size": [3840, 2160], "video_fps": 30}).size == (1280, 720)
+    assert resolve("upload", None, 1, infos={"video_size": [1440, 1080], "video_fps": 30}).size == (1440, 1080)
+    assert resolve("upload", None, 1, infos={"video_size": [1280, 720], "video_fps": 30}).size == (1920, 1080)
+    assert resolve("archive", None, 1, infos={"video_size": [1281, 721], "video_fps": 30}).size == (1280, 720)
+
+def test_faster_sources_drop_whole_frames():
+    assert fit_fps(120, 60) == 60
+    assert fit_fps(50, 30) == 25
+    assert fit_fps(60, 30) == 30
+    assert fit_fps(29.97, 30) == 29.97
+    assert fit_fps(None, PROFILES["draft"].max_fps) == 30
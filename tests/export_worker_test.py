@@ -0,0 +1,69 @@
+import os
+import glob
+import time
+import pytest
+from marker_type import MarkerType
+from export_engine import ExportJob
+from export_worker import ExportQueue
+from ffmpeg_utils import run_ffmpeg
+
+def group_members(pgid):
+    """Live processes in a process group, from /proc."""
+    members = []
+    for stat_path in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(stat_path) as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if fields[0] != "Z" and int(fields[2]) == pgid:
+            members.append(stat_path)
+    return members
+
+@pytest.fixture
+def long_video(tmp_path):
+    path = str(tmp_path / "long.mp4")
+    run_ffmpeg(["-f", "lavfi", "-i", "testsrc2=size=640x360:rate=30:duration=240", "-c:v", "libx264",
+                "-preset", "ultrafast", "-g", "30", "-pix_fmt", "yuv420p", path])
+    return path
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    return condition()
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="reads process groups from /proc")
+@pytest.mark.parametrize("how", ["cancel", "kill"])
+def test_stopping_a_segment_export_leaves_nothing_behind(qapp, long_video, tmp_path, how):
+    marks = []
+    for start in (0, 120):
+        marks += [(start * 1000, MarkerType.SERVE), ((start + 110) * 1000, MarkerType.HOME_PT)]
+    output_path = str(tmp_path / "out" / "match.mp4")
+    os.makedirs(os.path.dirname(output_path))
+    job = ExportJob(long_video, marks=marks, output_path=output_path, profile="draft", audio=False, add_score=False,
+                    stream_copy=False, segment_workers=2)
+    exports = ExportQueue()
+    task = exports.submit(job)
+    try:
+        def encoding():
+            exports.poll()
+            return task.stage == "encoding segments" and glob.glob(os.path.join(tmp_path, "out", "segments-*", "*.mp4"))
+        assert wait_for(encoding, 120), task.describe()
+        worker = exports.process.pid
+        assert len(group_members(worker)) > 2     # the worker, its pool and their ffmpeg
+        started = time.monotonic()
+        if how == "cancel":
+            exports.cancel(task)
+            # noticed while the segments are still encoding, not after them
+            assert wait_for(lambda: exports.poll() or task.state != "running", 20)
+        else:
+            exports.kill(task, "cancelled")
+        assert task.state == "cancelled"
+        assert time.monotonic() - started < 20
+        # a cancelled worker stays for the next export, its pool and ffmpeg don't
+        remaining = 0 if how == "kill" else 1
+        assert wait_for(lambda: len(group_members(worker)) == remaining, 5)
+        assert os.listdir(os.path.join(tmp_path, "out")) == []
+    finally:
+        exports.close()
@@ -0,0 +1,33 @@
+import fast_cut
+from ffmpeg_utils import run_ffmpeg, probe
+from seek_index import SeekIndex, build
+from export_profiles import resolve
+
+def test_cuts_start_on_keyframes_and_never_overlap():
+    index = SeekIndex(keyframes=[0.0, 6.0, 12.0, 18.0], frames=[])
+    clip_ranges = [(1.7, 7.5, "a"), (7.58, 14.8, "b"), (19.0, 21.0, "c")]
+    assert fast_cut.plan_cuts(clip_ranges, index) == [(0.0, 14.8, "b"), (18.0, 21.0, "c")]
+    assert fast_cut.plan_cuts(clip_ranges, None) == clip_ranges
+
+def test_stream_copy_doesnt_repeat_footage(tmp_path):
+    video_path = str(tmp_path / "source.mp4")
+    run_ffmpeg(["-f", "lavfi", "-i", "testsrc2=size=320x180:rate=10:duration=20", "-c:v", "libx264", "-g", "60",
+                "-pix_fmt", "yuv420p", video_path])
+    index = build(video_path)
+    clip_ranges = [(1.7, 7.5, "a"), (7.58, 14.8, "b")]
+    assert fast_cut.copy_blocker(video_path, size=(320, 180), clip_ranges=clip_ranges, index=index) is None
+    assert fast_cut.copy_blocker(video_path, size=(320, 180), clip_ranges=clip_ranges, index=None) is not None
+    output_path = str(tmp_path / "cut.mp4")
+    duration = fast_cut.stream_copy_export(video_path, clip_ranges, output_path, audio=False, index=index)
+    # one cut from the keyframe at 0 to the end of the second rally, not 0-7.5 plus 6-14.8
+    assert abs(duration - 14.8) < 0.2
+    assert abs(probe(output_path)["duration"] - 14.8) < 0.2
+
+def test_frame_rate_capped_by_the_profile_is_re_encoded(tmp_path):
+    video_path = str(tmp_path / "source.mp4")
+    run_ffmpeg(["-f", "lavfi", "-i", "testsrc2=size=320x180:rate=60:duration=1", "-c:v", "libx264",
+                "-pix_fmt", "yuv420p", video_path])
+    for profile, blocked in [("draft", True), ("upload", False)]:
+        settings = resolve(profile, video_path, 1)
+        reason = fast_cut.copy_blocker(video_path, size=(320, 180), fps=settings.fps)
+        assert (reason is not None) == blocked, (profile, reason)
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from timeline import TimelineWidget
 from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtCore import Qt
@@ -23,4 +23,20 @@ def test_app_loads(video_app, qtbot):
     assert video_app.isVisible()  # confirm it actually appeared
     # Wait for window to be exposed
     qtbot.waitExposed(video_app)
-    assert video_app.isVisible()
\ No newline at end of file
+    assert video_app.isVisible()
+@pytest.mark.parametrize("profile, logs_in", [("draft", False), ("upload", True)])
+def test_only_uploaded_exports_log_in(profile, logs_in):
+    window = MagicMock()
+    window.profile_box.currentText.return_value = profile
+    VideoApp.export(window)
+    window.exports.submit.assert_called_once()
+    assert window.uploads.authenticate.called == logs_in
+
+def test_saving_over_the_autosave_goes_through_the_journal(tmp_path):
+    window = MagicMock()
+    window.video_path = str(tmp_path / "match.mp4")
+    snapshot = str(tmp_path / "match_marks.json")
+    with patch("main.QFileDialog.getSaveFileName", return_value=(snapshot, "")):
+        VideoApp.save(window)
+    window.journal.reset.assert_called_once_with(window.marker_model.marks)
+    assert not (tmp_path / "match_marks.json").exists()
@@ -0,0 +1,60 @@
+import json
+import time
+from marker_type import MarkerType
+import marker_journal
+from marker_journal import MarkerJournal, replay
+
+def test_replay_after_close(tmp_path):
+    video = str(tmp_path / "match.mp4")
+    journal = MarkerJournal(video)
+    journal.add(1000, MarkerType.SERVE)
+    journal.add(3000, MarkerType.HOME_PT)
+    journal.add(2000, MarkerType.NO_PT)
+    journal.remove(2000, MarkerType.NO_PT)
+    journal.close()
+    marks, _ = replay(video)
+    assert list(marks) == [(1000, MarkerType.SERVE), (3000, MarkerType.HOME_PT)]
+    with open(marker_journal.snapshot_path(video), encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["file"] == video
+    assert snapshot["marks"] == [{"time": 1000, "label": "Serve"}, {"time": 3000, "label": "Home point"}]
+
+def test_replay_skips_compacted_records_and_torn_tail(tmp_path):
+    video = str(tmp_path / "match.mp4")
+    with open(marker_journal.snapshot_path(video), "w", encoding="utf-8") as f:
+        json.dump({"file": video, "seq": 2, "marks": [{"time": 1000, "label": "Serve"}, {"time": 3000, "label": "Home point"}]}, f)
+    with open(marker_journal.journal_path(video), "w", encoding="utf-8") as f:
+        # records 1 and 2 are already in the snapshot, the last line was cut off by a crash
+        f.write(json.dumps({"n": 1, "op": "add", "time": 1000, "label": "Serve"}) + "\n")
+        f.write(json.dumps({"n": 2, "op": "add", "time": 3000, "label": "Home point"}) + "\n")
+        f.write(json.dumps({"n": 3, "op": "add", "time": 4000, "label": "Away point"}) + "\n")
+        f.write('{"n": 4, "op": "add", "ti')
+    marks, seq = replay(video)
+    assert list(marks) == [(1000, MarkerType.SERVE), (3000, MarkerType.HOME_PT), (4000, MarkerType.AWAY_PT)]
+    assert seq == 3
+
+def test_compacts_in_background(tmp_path):
+    video = str(tmp_path / "match.mp4")
+    journal = MarkerJournal(video, compact_every=10)
+    for i in range(25):
+        journal.add(i * 1000, MarkerType.SERVE)
+    journal.reset([(500, MarkerType.AWAY_PT)])
+    journal.add(600, MarkerType.HOME_PT)
+    journal.close()
+    marks, seq = replay(video)
+    assert list(marks) == [(500, MarkerType.AWAY_PT), (600, MarkerType.HOME_PT)]
+    assert seq == 27
+
+def test_records_after_a_torn_tail_survive_the_next_crash(tmp_path):
+    video = str(tmp_path / "match.mp4")
+    with open(marker_journal.journal_path(video), "w", encoding="utf-8") as f:
+        f.write(json.dumps({"n": 1, "op": "add", "time": 1000, "label": "Serve"}) + "\n")
+        f.write('{"n": 2, "op": "add", "ti')
+    journal = MarkerJournal(video, *replay(video))
+    journal.add(5000, MarkerType.AWAY_PT)
+    # the editor crashes again before close(), with only the journal on disk
+    deadline = time.monotonic() + 5
+    while len(replay(video)[0]) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert list(replay(video)[0]) == [(1000, MarkerType.SERVE), (5000, MarkerType.AWAY_PT)]
+    journal.close()
@@ -0,0 +1,32 @@
+import json
+import time
+from metrics import ExportMetrics, report_path, update_report
+
+def test_stage_excluding_subtracts_inner_stages():
+    metrics = ExportMetrics()
+    with metrics.stage_excluding("encode", "decode"):
+        with metrics.stage("decode"):
+            time.sleep(0.05)
+    assert metrics.stages["decode"] >= 0.05
+    assert metrics.stages["encode"] < 0.04
+
+def test_merge_offsets_worker_rallies_and_adds_up(tmp_path):
+    metrics = ExportMetrics()
+    worker = ExportMetrics()
+    for i in (0, 1):
+        worker.rally(i)
+        worker.count("frames", 10)
+        worker.add_time("decode", 1.0)
+    metrics.merge(worker.snapshot(), rally_offset=2)
+    metrics.merge(worker.snapshot(), rally_offset=0)
+    output = str(tmp_path / "out.mp4")
+    clip_ranges = [(0, 1, "a"), (2, 3, "b"), (4, 5, "c"), (6, 7, "d")]
+    path = metrics.write_report({"video": None, "output": output}, clip_ranges)
+    assert path == report_path(output)
+    update_report(output, upload={"seconds": 1.5})
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["stages"]["decode"] == 4.0
+    assert report["counters"]["frames"] == 40
+    assert [(r["rally"], r["start"]) for r in report["rallies"]] == [(0, 0), (1, 2), (2, 4), (3, 6)]
+    assert report["upload"] == {"seconds": 1.5}
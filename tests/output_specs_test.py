@@ -0,0 +1,24 @@
+import pytest
+from output_specs import OutputSpec, parse_specs, plan_outputs, split_sets
+
+def test_parse_specs():
+    assert parse_specs("match, highlights:8,sets") == [OutputSpec("match"), OutputSpec("highlights", 8), OutputSpec("sets")]
+    assert parse_specs("") is None
+    with pytest.raises(ValueError):
+        parse_specs("match,bloopers")
+
+def test_sets_end_two_points_ahead_and_count_their_own_points():
+    # the score before each rally: 3-1 ends a set to 3, then 1-0 and 2-1 go on in the next
+    scores = [(0, 0), (1, 0), (2, 0), (2, 1), (3, 1), (4, 1), (4, 2)]
+    assert split_sets(scores, 3) == [(0, 4, (0, 0)), (4, 7, (3, 1))]
+    clip_ranges = [(i * 10, i * 10 + length, "x") for i, length in enumerate([5, 9, 2, 8, 3, 7, 1])]
+    outputs = plan_outputs(parse_specs("match,highlights:3,sets:3"), "out/match.mp4", clip_ranges, scores, "A vs B")
+    assert [output.path for output in outputs] == ["out/match.mp4", "out/match_highlights.mp4",
+                                                   "out/match_set1.mp4", "out/match_set2.mp4"]
+    assert [output.title for output in outputs] == ["A vs B", "A vs B Highlights", "A vs B Set 1", "A vs B Set 2"]
+    assert outputs[0].rallies == list(range(7))
+    # the longest rallies, kept in match order with the match's scores
+    assert outputs[1].rallies == [1, 3, 5]
+    assert outputs[1].scores == [(1, 0), (2, 1), (4, 1)]
+    assert outputs[3].rallies == [4, 5, 6]
+    assert outputs[3].scores == [(0, 0), (1, 0), (1, 1)]
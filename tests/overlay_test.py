@@ -0,0 +1,30 @@
+import numpy as np
+from overlay import Overlay, resolve_position
+
+def test_blend_matches_alpha_compositing():
+    """Only the overlay's band changes, and it matches straight alpha blending."""
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (120, 200, 3), dtype=np.uint8)
+    rgba = rng.integers(0, 256, (30, 200, 4), dtype=np.uint8)
+    original = frame.copy()
+
+    result = Overlay(rgba, 0, 10).blend(frame)
+
+    alpha = rgba[:, :, 3:4] / 255
+    expected = rgba[:, :, :3] * alpha + original[10:40] * (1 - alpha)
+    assert result is frame
+    assert np.abs(result[10:40].astype(int) - np.round(expected)).max() <= 1
+    assert np.array_equal(result[:10], original[:10])
+    assert np.array_equal(result[40:], original[40:])
+
+def test_blend_clips_to_frame():
+    frame = np.zeros((50, 50, 3), dtype=np.uint8)
+    frame.setflags(write=False)
+    rgba = np.full((20, 20, 4), 255, dtype=np.uint8)
+    result = Overlay(rgba, 40, -10).blend(frame)
+    assert result[:10, 40:].min() == 255
+    assert result[10:].max() == 0
+    assert result[:, :40].max() == 0
+
+def test_resolve_position():
+    assert resolve_position(("center", 20), (1920, 1080), (400, 135)) == (760, 20)
@@ -0,0 +1,53 @@
+import os
+import sys
+import threading
+import subprocess
+import numpy as np
+from marker_type import MarkerType
+import rally_detect
+from rally_detect import AudioFeatures, find_hits, propose_markers, SAMPLE_RATE
+
+def synthetic_audio(hit_times, seconds=60):
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 0.01, seconds * SAMPLE_RATE).astype(np.float32)
+    for t in hit_times:
+        i = int(t * SAMPLE_RATE)
+        samples[i:i + 80] += rng.normal(0, 0.5, 80) * np.exp(-np.arange(80) / 20)
+    return samples
+
+def test_features_do_not_depend_on_chunking():
+    samples = synthetic_audio([5, 20])
+    whole = AudioFeatures()
+    whole.feed(samples)
+    chunked = AudioFeatures()
+    for i in range(0, len(samples), 12345):
+        chunked.feed(samples[i:i + 12345])
+    assert np.allclose(whole.array(), chunked.array())
+
+def test_proposes_serve_and_no_point_around_rallies():
+    # two rallies and a lone hit that isn't one
+    samples = synthetic_audio([10, 10.8, 11.6, 12.4, 13.2, 30, 31, 32.5, 50])
+    features = AudioFeatures()
+    features.feed(samples)
+    hits = find_hits(features.array())
+    assert len(hits) == 9
+    markers = propose_markers(hits)
+    assert [m for _, m in markers] == [MarkerType.SERVE, MarkerType.NO_PT] * 2
+    assert [round(t / 100) for t, _ in markers] == [95, 142, 295, 335]
+
+def test_any_error_is_reported(monkeypatch):
+    def detect(video_path, cancel=None, progress=None):
+        raise ValueError("no audio track")
+    monkeypatch.setattr(rally_detect, "detect", detect)
+    errors = []
+    reported = threading.Event()
+    rally_detect.detect_in_background("match.mp4", lambda markers: None,
+                                      lambda error: (errors.append(error), reported.set()))
+    assert reported.wait(5)
+    assert errors == ["ValueError: no audio track"]
+
+def test_doesnt_load_the_export_stack():
+    loaded = subprocess.run([sys.executable, "-c", "import sys, rally_detect; print('export_engine' in sys.modules)"],
+                            cwd=os.path.dirname(os.path.abspath(rally_detect.__file__)),
+                            capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == "False"
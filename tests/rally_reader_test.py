@@ -0,0 +1,21 @@
+import numpy as np
+from ffmpeg_utils import run_ffmpeg
+from rally_reader import WritableFrameReader
+
+def test_frames_past_the_end_are_the_last_frame_as_decoded(tmp_path):
+    video_path = str(tmp_path / "short.mp4")
+    run_ffmpeg(["-f", "lavfi", "-i", "testsrc2=size=64x36:rate=10:duration=0.5", "-c:v", "libx264",
+                "-pix_fmt", "yuv444p", "-qp", "0", video_path])
+    reader = WritableFrameReader(video_path)
+    try:
+        frames = [reader.last_read.copy()]
+        for _ in range(7):
+            frame = reader.read_frame()
+            frames.append(frame.copy())
+            frame[:8] = 255     # an overlay blended in place
+        # 5 frames, the ones after the last repeat it without anything blended into it
+        assert not np.array_equal(frames[3], frames[4])
+        for frame in frames[5:]:
+            assert np.array_equal(frame, frames[4])
+    finally:
+        reader.close()
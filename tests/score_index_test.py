@@ -0,0 +1,45 @@
+import pytest
+from marker_type import MarkerType
+import score_index
+from score_index import ScoreIndex
+
+def test_score_at():
+    index = ScoreIndex([(5000, MarkerType.AWAY_PT), (1000, MarkerType.SERVE), (3000, MarkerType.HOME_PT)])
+    assert list(index) == [(1000, MarkerType.SERVE), (3000, MarkerType.HOME_PT), (5000, MarkerType.AWAY_PT)]
+    assert index.score_at(0) == (0, 0)
+    assert index.score_at(3000) == (0, 0)  # only points strictly before t
+    assert index.score_at(3001) == (1, 0)
+    assert index.score_at(10**9) == (1, 1)
+
+@pytest.mark.parametrize("block_size", [score_index.BLOCK_SIZE, 2])
+def test_updates_match_linear_count(monkeypatch, block_size):
+    """Scores stay right through inserts and deletes out of time order, also
+    as blocks split and empty."""
+    monkeypatch.setattr(score_index, "BLOCK_SIZE", block_size)
+    index = ScoreIndex()
+    marks = []
+    types = [MarkerType.HOME_PT, MarkerType.AWAY_PT, MarkerType.SERVE, MarkerType.NO_PT]
+    for i in range(200):
+        mark = ((i * 7919) % 1000 * 10, types[i % 4])
+        marks.append(mark)
+        index.add(*mark)
+        if i % 5 == 4:
+            removed = marks.pop(i % 3)
+            index.remove(*removed)
+        t = (i * 104729) % 10000
+        expected = (sum(1 for ts, m in marks if ts < t and m == MarkerType.HOME_PT),
+                    sum(1 for ts, m in marks if ts < t and m == MarkerType.AWAY_PT))
+        assert index.score_at(t) == expected
+        assert list(index) == sorted(marks)
+    assert len(index) == len(marks)
+    ordered = sorted(marks)
+    for start, stop in [(0, len(ordered)), (1, 7), (5, 60), (-9, -2), (30, 10), (0, 10**6)]:
+        assert index[start:stop] == ordered[start:stop]
+    assert index[::3] == ordered[::3]
+    for i, mark in enumerate(ordered):
+        assert index[i] == mark
+        assert index.score_before(i) == (sum(1 for _, m in ordered[:i] if m == MarkerType.HOME_PT),
+                                         sum(1 for _, m in ordered[:i] if m == MarkerType.AWAY_PT))
+    while len(index):
+        index.pop(len(index) // 2)
+    assert index.score_at(10**9) == (0, 0)
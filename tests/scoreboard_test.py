@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+import scoreboard
+from scoreboard import ScoreboardCache
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Scores rendered by the cache, as 1 KB images instead of real scoreboards."""
+    rendered = []
+    def render(home_name, away_name, score, width, font=None):
+        rendered.append(score)
+        return np.zeros((16, 16, 4), dtype=np.uint8)
+    monkeypatch.setattr(scoreboard, "render_text_scoreboard", render)
+    return rendered
+
+def test_each_scoreboard_is_rendered_once(renders):
+    cache = ScoreboardCache()
+    first = cache.get("Home", "Away", (1, 0), 1920)
+    assert cache.get("Home", "Away", (1, 0), 1920) is first
+    cache.get("Home", "Away", (1, 0), 1280)
+    cache.get("Home", "Away", (2, 0), 1920)
+    assert renders == [(1, 0), (1, 0), (2, 0)]
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert not first.flags.writeable     # shared, so nobody may draw on it
+
+def test_least_recently_used_is_evicted(renders):
+    cache = ScoreboardCache(max_bytes=2 * 1024)
+    cache.get("Home", "Away", (0, 0), 1920)
+    cache.get("Home", "Away", (1, 0), 1920)
+    cache.get("Home", "Away", (0, 0), 1920)     # now more recent than (1, 0)
+    cache.get("Home", "Away", (1, 1), 1920)
+    assert cache.nbytes == 2 * 1024
+    cache.get("Home", "Away", (0, 0), 1920)
+    cache.get("Home", "Away", (1, 0), 1920)
+    assert renders == [(0, 0), (1, 0), (1, 1), (1, 0)]
+
+def test_keeps_the_newest_image_over_budget(renders):
+    cache = ScoreboardCache(max_bytes=100)
+    cache.get("Home", "Away", (0, 0), 1920)
+    cache.get("Home", "Away", (1, 0), 1920)
+    assert cache.nbytes == 1024
+    cache.clear()
+    assert cache.nbytes == 0
+    cache.get("Home", "Away", (1, 0), 1920)
+    assert renders == [(0, 0), (1, 0), (1, 0)]
@@ -0,0 +1,25 @@
+import json
+import seek_index
+from ffmpeg_utils import run_ffmpeg, probe
+
+def test_times_start_at_zero_for_a_source_with_a_start_time(tmp_path):
+    video_path = str(tmp_path / "offset.mkv")
+    run_ffmpeg(["-f", "lavfi", "-i", "testsrc2=size=160x90:rate=10:duration=5", "-c:v", "libx264", "-g", "10",
+                "-output_ts_offset", "2", video_path])
+    assert probe(video_path)["start"] == 2.0
+    index = seek_index.build(video_path)
+    assert index.keyframes == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert index.frames[0] == 0.0
+    assert index.keyframe_before(2.5) == 2.0
+
+def test_indexes_from_older_versions_are_rebuilt(tmp_path):
+    video_path = str(tmp_path / "video.mkv")
+    run_ffmpeg(["-f", "lavfi", "-i", "testsrc2=size=160x90:rate=10:duration=1", "-c:v", "libx264", video_path])
+    seek_index.save(seek_index.build(video_path), seek_index.index_path(video_path))
+    assert seek_index.load(video_path) is not None
+    with open(seek_index.index_path(video_path), "r", encoding="utf-8") as f:
+        saved = json.load(f)
+    del saved["version"]
+    with open(seek_index.index_path(video_path), "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+    assert seek_index.load(video_path) is None
@@ -0,0 +1,19 @@
+import os
+import sidecar
+
+def test_sidecar_is_stale_once_the_video_changes(tmp_path):
+    video_path = str(tmp_path / "match.mp4")
+    with open(video_path, "wb") as f:
+        f.write(b"frames")
+    path = sidecar.sidecar_path(video_path, "index.json")
+    assert path == str(tmp_path / "match_index.json")
+    sidecar.write_json(path, sidecar.stamp(video_path, version=2))
+    saved = sidecar.read_json(path)
+    assert sidecar.is_fresh(saved, video_path, version=2)
+    assert not sidecar.is_fresh(saved, video_path, version=3)
+    with open(video_path, "ab") as f:
+        f.write(b"more frames")
+    assert not sidecar.is_fresh(saved, video_path, version=2)
+    os.remove(video_path)
+    assert not sidecar.is_fresh(saved, video_path, version=2)
+    assert sidecar.read_json(str(tmp_path / "missing.json")) is None
@@ -0,0 +1,11 @@
+import os
+from thumbnails import ThumbnailCache, cache_dir
+
+def test_missing_video_gives_empty_slots(qapp, tmp_path):
+    video_path = str(tmp_path / "missing.mkv")
+    thumbnails = ThumbnailCache(video_path)
+    try:
+        assert [image for _, image in thumbnails.slots(1, 60000)] == [None, None]
+    finally:
+        thumbnails.close()
+    assert not os.path.exists(cache_dir(video_path))
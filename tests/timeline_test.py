@@ -0,0 +1,14 @@
+from marker_type import MarkerType
+from score_index import ScoreIndex
+from timeline import TimelineWidget
+
+def test_paints_markers_from_a_score_index(qapp):
+    timeline = TimelineWidget()
+    timeline.resize(400, 40)
+    timeline.set_duration(60000)
+    # what the editor passes in, several markers to some columns
+    timeline.set_markers(ScoreIndex([(t, MarkerType.SERVE) for t in range(0, 60000, 50)] +
+                                    [(30020, MarkerType.HOME_PT)]))
+    timeline.grab()
+    assert len(timeline.columns) == 400
+    assert dict(timeline.columns)[200] == timeline.marker_columns()[200]
@@ -0,0 +1,159 @@
+"""Thumbnails for the timeline filmstrip.
+
+Thumbnails sit on a grid of power-of-two levels: level l splits the video
+into 2**l slots and takes a frame at the start of each. Every time on a
+level is also on all finer levels, so refining the strip only extracts the
+new half of the slots, and until they arrive each slot shows the nearest
+coarser thumbnail. Frames are grabbed one ffmpeg call at a time by a small
+thread pool, kept in a memory LRU and saved as JPEGs in <stem>_thumbs/
+next to the video. MAX_LEVEL bounds how many a video can ever have,
+however long it is.
+"""
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage
+from ffmpeg_utils import run_ffmpeg, FFmpegError
+import sidecar
+
+THUMB_HEIGHT = 36
+MAX_LEVEL = 9           # at most 2**9 slots across the timeline
+MEMORY_THUMBS = 600     # about 9 kB each in memory
+WORKERS = 2
+
+def cache_dir(video_path):
+    return sidecar.sidecar_path(video_path, "thumbs")
+
+def slot_time(level, k, duration):
+    return k * duration // 2**level
+
+def extract(path, t, height=THUMB_HEIGHT):
+    """JPEG bytes of the frame near t ms (from the keyframe before it)."""
+    proc = run_ffmpeg(["-ss", t / 1000, "-noaccurate_seek", "-i", path, "-map", "0:v:0", "-frames:v", "1",
+                       "-vf", f"scale=-2:{height}", "-threads", "1", "-f", "image2pipe", "-c:v", "mjpeg", "-q:v", "5", "-"])
+    return proc.stdout
+
+class ThumbnailCache(QObject):
+    thumbnail_ready = pyqtSignal(int)  # ms, emitted from a pool thread
+
+    def __init__(self, video_path, decode_path=None, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.decode_path = decode_path or video_path  # e.g. the proxy, it has the same frames
+        self.dir = cache_dir(video_path)
+        self.images = OrderedDict()  # ms -> QImage
+        self.wanted = []             # ms, in the order to extract them
+        self.in_flight = set()
+        self.failed = set()
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="thumbnails")
+        self.closed = False
+        self.check_disk_cache()
+
+    def check_disk_cache(self):
+        """Empty the disk cache if it was made from a different version of the video."""
+        try:
+            info = sidecar.stamp(self.video_path, height=THUMB_HEIGHT)
+        except OSError as e:
+            # nothing to extract from either, so leave any cache that's there alone
+            print(f"Can't read {self.video_path} for thumbnails: {e}")
+            return
+        info_path = os.path.join(self.dir, "source.json")
+        if sidecar.is_fresh(sidecar.read_json(info_path), self.video_path, height=THUMB_HEIGHT):
+            return
+        shutil.rmtree(self.dir, ignore_errors=True)
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            sidecar.write_json(info_path, info)
+        except OSError as e:
+            print(f"Can't cache thumbnails in {self.dir}: {e}")
+
+    # --- GUI thread ---
+    def get(self, t):
+        with self.lock:
+            image = self.images.get(t)
+            if image is not None:
+                self.images.move_to_end(t)
+            return image
+
+    def slots(self, level, duration):
+        """(ms, QImage or None) for each slot on level, using the nearest
+        coarser thumbnail while a slot's own is missing, and asking for the
+        missing ones (coarsest first). Never waits for an extraction."""
+        level = min(level, MAX_LEVEL)
+        wanted = []
+        with self.lock:
+            for l in range(level + 1):
+                for k in range(2**l):
+                    t = slot_time(l, k, duration)
+                    if t not in self.images and t not in self.failed:
+                        wanted.append(t)
+        self.request(wanted)
+        result = []
+        for k in range(2**level):
+            for l in range(level, -1, -1):
+                image = self.get(slot_time(l, k >> (level - l), duration))
+                if image is not None:
+                    break
+            result.append((slot_time(level, k, duration), image))
+        return result
+
+    def request(self, times):
+        """Replace the queue of thumbnails to extract."""
+        with self.lock:
+            self.wanted = [t for t in dict.fromkeys(times) if t not in self.in_flight]
+            self.wanted.reverse()  # popped from the end
+            starts = max(0, WORKERS - len(self.in_flight))
+        for _ in range(starts):
+            self.start_next()
+
+    def close(self):
+        self.closed = True
+        with self.lock:
+            self.wanted = []
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- pool threads ---
+    def start_next(self):
+        with self.lock:
+            if self.closed or not self.wanted or len(self.in_flight) >= WORKERS:
+                return
+            t = self.wanted.pop()
+            self.in_flight.add(t)
+        self.pool.submit(self.load, t)
+
+    def load(self, t):
+        try:
+            path = os.path.join(self.dir, f"{t}.jpg")
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = extract(self.decode_path, t)
+                if data:
+                    try:
+                        with open(path, "wb") as f:
+                            f.write(data)
+                    except OSError:
+                        pass
+            image = QImage.fromData(data, "JPG") if data else QImage()
+            with self.lock:
+                if image.isNull():
+                    self.failed.add(t)
+                else:
+                    self.images[t] = image
+                    while len(self.images) > MEMORY_THUMBS:
+                        self.images.popitem(last=False)
+        except FFmpegError as e:
+            print(f"Couldn't extract a thumbnail at {t} ms: {e}")
+            with self.lock:
+                self.failed.add(t)
+        finally:
+            with self.lock:
+                self.in_flight.discard(t)
+        if not self.closed:
+            self.thumbnail_ready.emit(t)
+            self.start_next()
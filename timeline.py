@@ -1,7 +1,10 @@
-from PyQt6.QtWidgets import QWidget, QListWidget
-from PyQt6.QtGui import QPainter, QColor
-from PyQt6.QtCore import Qt
+import math
+from bisect import bisect_left
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QPainter, QColor, QPixmap
+from PyQt6.QtCore import Qt, QRect, pyqtSignal
 from marker import Marker
+from thumbnails import THUMB_HEIGHT
 
 MARKER_TYPES = {
     Marker.MarkerType.SERVE: "yellow",
@@ -9,50 +12,151 @@ MARKER_TYPES = {
     Marker.MarkerType.HOME_PT: "green",
     Marker.MarkerType.AWAY_PT: "red"
 }
+# When markers share a pixel column, the one shown is the first in this list
+MARKER_PRIORITY = [
+    Marker.MarkerType.HOME_PT,
+    Marker.MarkerType.AWAY_PT,
+    Marker.MarkerType.SERVE,
+    Marker.MarkerType.NO_PT
+]
+BACKGROUND = QColor(30, 30, 30)
+PLAYHEAD = QColor(200, 200, 255)
+
 class TimelineWidget(QWidget):
+    seek_requested = pyqtSignal(int)  # ms
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.position = 0      # Current playback position in ms
         self.duration = 1      # Video duration in ms
-        self.markers =[]       # list of Marker objects
+        self.markers =[]       # (timestamp, MarkerType) pairs in time order
+        self.layer = None      # thumbnails and markers, redrawn only when they change
+        self.columns = None    # marker_columns(), kept until the markers or size change
+        self.thumbnails = None # ThumbnailCache for the filmstrip
+        self.colors = {name: QColor(color) for name, color in MARKER_TYPES.items()}
+
+        self.setMinimumHeight(THUMB_HEIGHT)  # Visible height for timeline
 
-        self.setMinimumHeight(30)  # Visible height for timeline
+    def x_at(self, t):
+        x = int((t / self.duration) * self.width())
+        return min(max(x, 0), self.width())
 
     def set_position(self, pos):
+        old_x = self.x_at(self.position)
         self.position = pos
-        self.update()
+        new_x = self.x_at(pos)
+        if new_x != old_x:
+            # repaint just the columns the playhead left and entered
+            self.update(old_x - 1, 0, 3, self.height())
+            self.update(new_x - 1, 0, 3, self.height())
 
     def set_duration(self, dur):
-        self.duration = max(dur, 1)
-        self.update()
+        dur = max(dur, 1)
+        if dur != self.duration:
+            self.duration = dur
+            self.invalidate()
 
     def set_markers(self, markers):
         self.markers = markers
+        self.invalidate()
+
+    def set_thumbnails(self, thumbnails):
+        if self.thumbnails:
+            self.thumbnails.thumbnail_ready.disconnect(self.thumbnail_ready)
+        self.thumbnails = thumbnails
+        if thumbnails:
+            thumbnails.thumbnail_ready.connect(self.thumbnail_ready)
+        self.invalidate()
+
+    def thumbnail_ready(self, t):
+        # rebuilt on the next paint, however many arrive before it
+        self.layer = None
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
+    def invalidate(self):
+        self.layer = None
+        self.columns = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self.layer = None
+        self.columns = None
+        super().resizeEvent(event)
+
+    def marker_columns(self):
+        """Pixel column -> marker type to draw there, one per column.
+
+        Markers are in time order, so each column's markers are found with a
+        bisect and the cost follows the number of columns, not markers.
+        """
+        rank = {name: i for i, name in enumerate(MARKER_PRIORITY)}
+        w = self.width()
+        scale = w / self.duration
+        markers = self.markers
+        columns = {}
+        i = 0
+        while i < len(markers):
+            x = min(max(int(markers[i][0] * scale), 0), w)
+            # first marker past this column, markers past the end all go in the last one
+            if x < w:
+                j = max(bisect_left(markers, (math.ceil((x + 1) / scale),), i), i + 1)
+            else:
+                j = len(markers)
+            names = {name for _, name in markers[i:j]}
+            columns[x] = min(names, key=rank.get)
+            i = j
+        return columns
+
+    def render_layer(self):
+        ratio = self.devicePixelRatioF()
+        w, h = self.width(), self.height()
+        layer = QPixmap(max(1, round(w * ratio)), max(1, round(h * ratio)))
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(BACKGROUND)
+        painter = QPainter(layer)
+        self.draw_thumbnails(painter)
+        if self.columns is None:
+            self.columns = sorted(self.marker_columns().items())
+        for x, name in self.columns:
+            painter.setBrush(self.colors[name])
+            painter.drawRect(x-1, 0, 2, h)
+        painter.end()
+        return layer
+
+    def draw_thumbnails(self, painter):
+        """Filmstrip of whatever thumbnails are ready, one per slot of about
+        a thumbnail's width."""
+        if self.thumbnails is None or self.duration <= 1:
+            return
         w, h = self.width(), self.height()
+        thumb_w = h * 16 / 9
+        level = max(0, math.ceil(math.log2(max(w / thumb_w, 1))))
+        slots = self.thumbnails.slots(level, self.duration)
+        slot_w = w / len(slots)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for k, (t, image) in enumerate(slots):
+            if image is None:
+                continue
+            slot = QRect(round(k * slot_w), 0, round((k + 1) * slot_w) - round(k * slot_w), h)
+            painter.setClipRect(slot)
+            image_w = image.width() * h / max(image.height(), 1)
+            painter.drawImage(QRect(slot.x(), 0, round(image_w), h), image)
+        painter.setClipping(False)
 
-        # Background
-        painter.fillRect(0, 0, w, h, QColor(30, 30, 30))
+    def paintEvent(self, event):
+        if self.layer is None:
+            self.layer = self.render_layer()
+        painter = QPainter(self)
+        painter.setClipRect(event.rect())
+        painter.drawPixmap(0, 0, self.layer)
 
         # Draw current position line
-        x_pos = int((self.position / self.duration) * self.width())
-        x_pos = min(max(x_pos, 0), self.width())
-
-        painter.setPen(QColor(200, 200, 255))
-        painter.drawLine(x_pos, 0, x_pos, h)
-
-        # Draw markers
-        for marker in self.markers:
-            name = marker.marker_type
-            t = marker.timestamp
-            painter.setBrush(QColor(MARKER_TYPES[name]))
-            x = int((t / self.duration) * w)
-            painter.drawRect(x-1, 0, 2, h)
+        x_pos = self.x_at(self.position)
+        painter.setPen(PLAYHEAD)
+        painter.drawLine(x_pos, 0, x_pos, self.height())
+
     def mousePressEvent(self, event):
         x = event.position().x()
         pos_ratio = x / self.width()
         new_time = int(pos_ratio * self.duration)
-        self.parent().player.set_time(new_time)
\ No newline at end of file
+        self.seek_requested.emit(new_time)
@@ -0,0 +1,157 @@
+"""Uploads finished exports in the background while the next one encodes.
+
+UploadQueue keeps one authorized session for all uploads and runs up to
+UPLOAD_WORKERS of them at a time on a thread pool. The queue is saved to
+QUEUE_PATH whenever it changes, so uploads that were queued or interrupted
+when the editor closed are picked up again next time; an interrupted upload
+continues from its saved resumable session (see auto_upload). Failed uploads
+are kept as failed rather than retried on every launch, until the export is
+submitted again.
+"""
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from PyQt6.QtCore import QObject, pyqtSignal
+import metrics
+
+QUEUE_PATH = "upload_queue.json"
+UPLOAD_WORKERS = 2
+
+class UploadCancelled(Exception):
+    pass
+
+@dataclass
+class UploadTask:
+    path: str
+    title: str = None           # the video's title on YouTube, None for the file's name
+    state: str = "queued"       # queued, uploading, done, failed
+    sent: int = 0
+    total: int = 0
+    video_id: str = None
+    error: str = None
+
+    def describe(self):
+        name = os.path.basename(self.path)
+        if self.state == "uploading" and self.total:
+            return f"{name}: uploading {self.sent * 100 // self.total}%"
+        if self.state == "failed":
+            return f"{name}: upload failed ({self.error})"
+        return f"{name}: {self.state}"
+
+class UploadQueue(QObject):
+    task_changed = pyqtSignal(object)  # UploadTask, emitted from upload threads too
+
+    def __init__(self, state_path=QUEUE_PATH, workers=UPLOAD_WORKERS, parent=None):
+        super().__init__(parent)
+        self.state_path = state_path
+        self.session = None
+        self.tasks = []
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload")
+        self.closed = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in saved:
+            if not os.path.exists(entry["path"]):
+                continue
+            task = UploadTask(entry["path"], entry.get("title"))
+            if entry.get("state") == "failed":
+                task.state, task.error = "failed", entry.get("error")
+            # anything else unfinished goes again, resuming where it stopped
+            self.tasks.append(task)
+
+    def save(self):
+        with self.lock:
+            entries = [asdict(task) for task in self.tasks if task.state != "done"]
+        tmp_path = self.state_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Couldn't save the upload queue: {e}")
+
+    # --- GUI thread ---
+    def authenticate(self):
+        """Log in now (this may open a browser) rather than on an upload thread."""
+        if self.session is None:
+            # the Google libraries are slow to import, so they wait for the first upload
+            import auto_upload
+            self.session = auto_upload.authorized_session()
+
+    def pending(self):
+        with self.lock:
+            return [task for task in self.tasks if task.state in ("queued", "uploading")]
+
+    def resume(self):
+        """Start the uploads left over from last time."""
+        tasks = self.pending()
+        if tasks:
+            print(f"Resuming {len(tasks)} upload(s)")
+            self.authenticate()
+            for task in tasks:
+                self.start(task)
+
+    def submit(self, path, title=None):
+        with self.lock:
+            for task in self.tasks:
+                if task.path == path and task.state in ("queued", "uploading"):
+                    return task
+            # a new try replaces the one that failed
+            self.tasks = [task for task in self.tasks if task.path != path]
+            task = UploadTask(path, title)
+            self.tasks.append(task)
+        self.save()
+        self.authenticate()
+        self.start(task)
+        return task
+
+    def start(self, task):
+        self.task_changed.emit(task)
+        self.pool.submit(self.run, task)
+
+    def close(self):
+        """Stop after the chunks being sent; unfinished uploads stay queued on disk."""
+        self.closed = True
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    # --- upload threads ---
+    def run(self, task):
+        if self.closed:
+            return
+        task.state = "uploading"
+        self.save()
+        self.task_changed.emit(task)
+        started = time.perf_counter()
+        try:
+            import auto_upload
+            response = auto_upload.upload_video(task.path, task.title, progress=lambda sent, total: self.progress(task, sent, total),
+                                                session=self.session)
+            task.state = "done"
+            task.video_id = response.get("id")
+            # alongside the export's own timings, if it wrote a report
+            metrics.update_report(task.path, upload={"seconds": round(time.perf_counter() - started, 3),
+                                                     "bytes": task.total, "video_id": task.video_id})
+        except UploadCancelled:
+            return
+        except Exception as e:
+            task.state = "failed"
+            task.error = f"{type(e).__name__}: {e}"
+            print(f"Upload of {task.path} failed: {task.error}")
+        self.save()
+        self.task_changed.emit(task)
+
+    def progress(self, task, sent, total):
+        if self.closed:
+            raise UploadCancelled()
+        task.sent, task.total = sent, total
+        self.task_changed.emit(task)